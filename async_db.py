@@ -0,0 +1,132 @@
+import itertools
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class _CallSignals(QObject):
+    """Сигналы фонового вызова: (id вызова, результат или исключение)"""
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, object)
+
+
+class _DbCall(QRunnable):
+    """Вызов метода Database в потоке из QThreadPool"""
+
+    def __init__(self, call_id, fn, args, kwargs):
+        super().__init__()
+        # Объектом владеет AsyncDatabase (хранит его до завершения вызова):
+        # при autoDelete пул удалил бы C++-объект после run(), и tryTake
+        # в cancel() обратился бы к удалённому объекту
+        self.setAutoDelete(False)
+        self.call_id = call_id
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = _CallSignals()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.failed.emit(self.call_id, e)
+            return
+        self.signals.finished.emit(self.call_id, result)
+
+
+class AsyncDatabase(QObject):
+    """Асинхронный фасад над Database для GUI.
+
+    Методы Database выполняются в QThreadPool, результат приходит в
+    обработчик on_result уже в потоке GUI. Вызовы группируются по ключу:
+    новый вызов с тем же ключом отменяет предыдущий (если тот ещё в
+    очереди — он снимается, если уже выполняется — его результат
+    отбрасывается). busy_changed сообщает, идёт ли загрузка.
+    """
+
+    busy_changed = pyqtSignal(bool)
+
+    def __init__(self, db, parent=None, max_threads: int | None = None):
+        super().__init__(parent)
+        self.db = db
+        self.thread_pool = QThreadPool(self)
+        if max_threads is None:
+            # Без пула соединений параллельные запросы всё равно идут по очереди
+            max_threads = db.pool.maxconn if db.pool is not None else 1
+        self.thread_pool.setMaxThreadCount(max_threads)
+
+        self._ids = itertools.count(1)
+        self._calls = {}    # id вызова -> (ключ, on_result, on_error, runnable)
+        self._latest = {}   # ключ -> id последнего вызова
+
+    def call(self, key, method, *args, on_result=None, on_error=None, **kwargs) -> int:
+        """Выполняет self.db.<method>(*args, **kwargs) в фоне.
+
+        Args:
+            key: ключ группы вызовов (например, 'statistics'); None — без отмены
+            method: имя метода Database или функция
+            on_result: обработчик результата (в потоке GUI)
+            on_error: обработчик исключения (в потоке GUI); без него
+                ошибка отбрасывается, как и у отменённых вызовов
+
+        Returns:
+            id вызова
+        """
+        if key is not None:
+            self.cancel(key)
+
+        call_id = next(self._ids)
+        fn = getattr(self.db, method) if isinstance(method, str) else method
+        runnable = _DbCall(call_id, fn, args, kwargs)
+        # Слоты — методы объекта из потока GUI, поэтому сигналы из
+        # рабочего потока доставляются через очередь событий
+        runnable.signals.finished.connect(self._on_finished)
+        runnable.signals.failed.connect(self._on_failed)
+
+        self._calls[call_id] = (key, on_result, on_error, runnable)
+        if key is not None:
+            self._latest[key] = call_id
+        if len(self._calls) == 1:
+            self.busy_changed.emit(True)
+
+        self.thread_pool.start(runnable)
+        return call_id
+
+    def cancel(self, key):
+        """Отменяет последний вызов с ключом key"""
+        call_id = self._latest.pop(key, None)
+        if call_id is None or call_id not in self._calls:
+            return
+        runnable = self._calls[call_id][3]
+        if self.thread_pool.tryTake(runnable):
+            self._forget(call_id)
+        else:
+            # Уже выполняется: результат будет проигнорирован
+            self._calls[call_id] = (key, None, None, runnable)
+
+    def is_busy(self, key=None) -> bool:
+        if key is None:
+            return bool(self._calls)
+        return key in self._latest
+
+    def _forget(self, call_id):
+        key = self._calls.pop(call_id)[0]
+        if key is not None and self._latest.get(key) == call_id:
+            del self._latest[key]
+        if not self._calls:
+            self.busy_changed.emit(False)
+
+    def _on_finished(self, call_id, result):
+        if call_id not in self._calls:
+            return
+        on_result = self._calls[call_id][1]
+        self._forget(call_id)
+        if on_result is not None:
+            on_result(result)
+
+    def _on_failed(self, call_id, error):
+        if call_id not in self._calls:
+            return
+        on_error = self._calls[call_id][2]
+        self._forget(call_id)
+        if on_error is not None:
+            on_error(error)
@@ -1,9 +1,154 @@
+import datetime
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from typing import List, Dict, Optional, Iterator, Tuple
+
 import psycopg2
 from psycopg2 import Error
-from typing import List, Dict, Optional
+from psycopg2 import extensions
+from psycopg2 import extras
+from psycopg2 import pool as pg_pool
 import bcrypt
 
 
+# Допустимые значения из CHECK-ограничений схемы (table_updated.sql)
+USER_TYPES = ('Менеджер', 'Специалист', 'Оператор', 'Заказчик', 'Менеджер по качеству')
+REQUEST_STATUSES = ('Новая заявка', 'В процессе ремонта', 'Готова к выдаче', 'Ожидание комплектующих')
+# Значение фильтра master_id: заявки без мастера (user_id в БД начинаются с 1)
+NO_MASTER = 0
+
+def hash_password(password: str) -> str:
+    """bcrypt-хеш пароля (функция модуля, чтобы её можно было
+    выполнять в пуле процессов при импорте)"""
+    return bcrypt.hashpw(
+        password.encode('utf-8'),
+        bcrypt.gensalt()
+    ).decode('utf-8')
+
+
+class QueryHandle:
+    """Отмена выполняющегося запроса из другого потока.
+
+    Метод Database, получивший handle, привязывает к нему соединение на
+    время запроса; cancel() отправляет серверу запрос отмены
+    (pg_cancel_backend по протоколу), и запрос завершается
+    QueryCanceledError. Отменённый заранее handle не даёт запросу начаться.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conn = None
+        self._cancel_thread = None
+        self.cancelled = False
+
+    def cancel(self):
+        """Не блокирует: запрос отмены — сетевой обмен с сервером, поэтому
+        отправляется из отдельного потока (cancel вызывается из GUI)"""
+        with self._lock:
+            self.cancelled = True
+            if self._conn is not None and self._cancel_thread is None:
+                self._cancel_thread = threading.Thread(
+                    target=self._send_cancel, args=(self._conn,), daemon=True
+                )
+                self._cancel_thread.start()
+
+    @staticmethod
+    def _send_cancel(conn):
+        try:
+            conn.cancel()
+        except Error as e:
+            print(f"QueryHandle.cancel error: {e}")
+
+    @contextmanager
+    def attached(self, conn, discard=None):
+        """Привязка соединения на время блока with.
+
+        Если за это время была отправлена отмена, по выходу из блока
+        дожидается её отправки и вызывает discard(conn): отмена, дошедшая
+        до сервера после конца запроса, не должна прервать следующий
+        запрос на этом соединении.
+        """
+        with self._lock:
+            if self.cancelled:
+                raise extensions.QueryCanceledError("canceling statement due to user request")
+            self._conn = conn
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._conn = None
+                cancel_thread = self._cancel_thread
+            if cancel_thread is not None:
+                cancel_thread.join()
+                if discard is not None:
+                    discard(conn)
+
+
+# Выгрузки для аналитики (export_data.py): колонки без вычислений на клиенте
+EXPORT_QUERIES = {
+    'requests': """
+        SELECT r.request_id, r.start_date, r.climate_tech_type,
+               r.climate_tech_model, r.problem_description,
+               r.request_status, r.due_date, r.completion_date,
+               r.repair_parts,
+               r.client_id, u_client.fio AS client_name, u_client.phone AS client_phone,
+               r.master_id, u_master.fio AS master_name,
+               r.created_at, r.updated_at
+        FROM requests r
+        JOIN users u_client ON r.client_id = u_client.user_id
+        LEFT JOIN users u_master ON r.master_id = u_master.user_id
+    """,
+    'comments': """
+        SELECT c.comment_id, c.request_id, c.created_at,
+               c.master_id, u.fio AS master_name, c.message
+        FROM comments c
+        JOIN requests r ON c.request_id = r.request_id
+        JOIN users u ON c.master_id = u.user_id
+    """,
+}
+
+# Общая выборка заявок с ФИО клиента и мастера; порядок колонок
+# соответствует Database._request_from_row
+REQUESTS_FIELDS = """
+    r.request_id, r.start_date, r.climate_tech_type,
+    r.climate_tech_model, r.problem_description,
+    r.request_status,
+    r.due_date,
+    r.completion_date,
+    u_client.fio,
+    u_master.fio,
+    r.client_id,
+    r.master_id
+"""
+REQUESTS_FROM = """
+    FROM requests r
+    JOIN users u_client ON r.client_id = u_client.user_id
+    LEFT JOIN users u_master ON r.master_id = u_master.user_id
+"""
+REQUESTS_SELECT = "SELECT" + REQUESTS_FIELDS + REQUESTS_FROM
+
+# Сколько секунд кэшируется список специалистов (get_specialists_cached)
+SPECIALISTS_CACHE_TTL = 300
+
+# Метка get_requests_changed_since. updated_at ставится временем начала
+# транзакции, которая меняет строку, а видна строка становится только после
+# коммита. Поэтому метка — не позже начала самой старой открытой транзакции
+# в базе (кроме нашей): всё, что она запишет, будет не раньше метки.
+# Строки на границе придут повторно — слияние идемпотентно.
+SYNC_WATERMARK_SQL = """
+    SELECT LEAST(
+        LOCALTIMESTAMP,
+        (SELECT min(xact_start)::timestamp
+         FROM pg_stat_activity
+         WHERE datname = current_database()
+           AND pid <> pg_backend_pid())
+    )
+"""
+
+
 class Database:
     """Класс для работы с базой данных PostgreSQL"""
 
@@ -13,35 +158,195 @@ class Database:
         database: str | None = None,
         user: str | None = None,
         password: str | None = None,
-        port: int | None = None
+        port: int | None = None,
+        pool_min: int | None = None,
+        pool_max: int | None = None,
+        pool_timeout: float = 30.0
     ):
         """Параметры можно передавать явно или через переменные окружения:
         DB_HOST, DB_NAME, DB_USER, DB_PASSWORD, DB_PORT.
+
+        Если задан pool_max (или DB_POOL_MAX), включается пул соединений
+        размером pool_min..pool_max (DB_POOL_MIN): каждый метод берёт
+        своё соединение и курсор, поэтому окна и фоновые загрузчики могут
+        работать с БД одновременно. Без пула используется одно соединение.
         """
-        import os
         host = host or os.getenv('DB_HOST', 'localhost')
         database = database or os.getenv('DB_NAME', 'climate_service')
         user = user or os.getenv('DB_USER', 'postgres')
         password = password or os.getenv('DB_PASSWORD', '')
         port = port or int(os.getenv('DB_PORT', '5432'))
+        pool_max = pool_max or int(os.getenv('DB_POOL_MAX', '0'))
+        pool_min = pool_min or int(os.getenv('DB_POOL_MIN', '1'))
+
+        self.pool = None
+        # Параметры для отдельных соединений потоковой выдачи (stream_transaction)
+        self._connect_params = dict(
+            host=host, database=database, user=user, password=password, port=port
+        )
+        # Без пула общее соединение отдаётся потокам по очереди
+        self._lock = threading.RLock()
+        self.pool_timeout = pool_timeout
+        # (время загрузки, список) для get_specialists_cached
+        self._specialists_cache = None
+        self.connection = None
+        self.cursor = None
+        self.conn = None
+        # Соединения, которые get_connection закрывает вместо повторного использования
+        self._discarded = set()
 
         try:
-            self.connection = psycopg2.connect(
-                host=host,
-                database=database,
-                user=user,
-                password=password,
-                port=port
-            )
-            self.connection.autocommit = True
-            self.cursor = self.connection.cursor()
-            # Добавляем алиас conn для совместимости с main_app.py
-            self.conn = self.connection
-            print("Подключение к PostgreSQL успешно")
+            if pool_max:
+                self.pool = pg_pool.ThreadedConnectionPool(
+                    min(pool_min, pool_max),
+                    pool_max,
+                    **self._connect_params
+                )
+                # ThreadedConnectionPool не ждёт освобождения соединения,
+                # а сразу бросает PoolError — ограничиваем выдачу семафором
+                self._pool_slots = threading.BoundedSemaphore(pool_max)
+                print(f"Пул подключений к PostgreSQL создан ({pool_min}..{pool_max})")
+            else:
+                self._connect()
+                print("Подключение к PostgreSQL успешно")
         except Error as e:
             print(f"Ошибка подключения к БД: {e}")
             raise
 
+    def _connect(self):
+        """Открывает общее соединение (режим без пула)"""
+        self.connection = psycopg2.connect(**self._connect_params)
+        self.connection.autocommit = True
+        self.cursor = self.connection.cursor()
+        # Добавляем алиас conn для совместимости с main_app.py
+        self.conn = self.connection
+
+    # ===================== CONNECTIONS =====================
+
+    @contextmanager
+    def get_connection(self):
+        """Выдаёт соединение на время блока with.
+
+        В режиме пула соединение берётся из пула и возвращается в него
+        по выходу из блока (незавершённая транзакция откатывается).
+        Без пула отдаётся общее соединение. Соединение, помеченное
+        discard_connection, закрывается (без пула — переоткрывается после
+        внешней транзакции).
+        """
+        if self.pool is None:
+            with self._lock:
+                try:
+                    yield self.connection
+                finally:
+                    if self.connection.autocommit and self._take_discarded(self.connection):
+                        self.cursor.close()
+                        self.connection.close()
+                        self._connect()
+            return
+
+        if not self._pool_slots.acquire(timeout=self.pool_timeout):
+            raise pg_pool.PoolError("Нет свободных соединений в пуле")
+        try:
+            conn = self.pool.getconn()
+        except Exception:
+            self._pool_slots.release()
+            raise
+
+        try:
+            if not conn.autocommit:
+                conn.autocommit = True
+            yield conn
+        finally:
+            broken = self._take_discarded(conn) or bool(conn.closed)
+            if not broken:
+                status = conn.get_transaction_status()
+                if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    broken = True
+                elif status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            self.pool.putconn(conn, close=broken)
+            self._pool_slots.release()
+
+    def discard_connection(self, conn):
+        """Помечает соединение, которое нельзя отдавать следующим запросам"""
+        self._discarded.add(conn)
+
+    def _take_discarded(self, conn) -> bool:
+        if conn in self._discarded:
+            self._discarded.remove(conn)
+            return True
+        return False
+
+    @contextmanager
+    def get_cursor(self):
+        """Курсор на отдельном (в режиме пула) соединении"""
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                yield cur
+
+    @contextmanager
+    def transaction(self, isolation_level: str | None = None, readonly: bool = False):
+        """Блок with в одной транзакции: COMMIT по выходу, ROLLBACK при ошибке.
+
+        Соединения работают в autocommit, поэтому на время блока он
+        выключается. Без пула вложенный вызов (и любой метод Database,
+        вызванный из блока в том же потоке) получает то же соединение и
+        выполняется внутри внешней транзакции; в режиме пула он берёт
+        другое соединение и в эту транзакцию не входит.
+
+        Args:
+            isolation_level: например 'REPEATABLE READ' (None — по умолчанию сервера)
+            readonly: транзакция только для чтения
+        """
+        with self.get_connection() as conn:
+            if not conn.autocommit:
+                yield conn
+                return
+
+            conn.autocommit = False
+            try:
+                modes = []
+                if isolation_level:
+                    modes.append(f"ISOLATION LEVEL {isolation_level}")
+                if readonly:
+                    modes.append("READ ONLY")
+                if modes:
+                    with conn.cursor() as cur:
+                        cur.execute("SET TRANSACTION " + ", ".join(modes))
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                conn.autocommit = True
+
+    @contextmanager
+    def stream_transaction(self, readonly: bool = True):
+        """Транзакция на собственном соединении для потоковой выдачи
+        (именованный курсор, который читается между yield).
+
+        Пока генератор не исчерпан, вызывающий код может обращаться к
+        Database: без пула его вызовы не должны попадать в транзакцию
+        выдачи (и откатываться вместе с ней при досрочном закрытии
+        генератора) и ждать блокировки общего соединения, поэтому
+        открывается отдельное соединение. В режиме пула соединение
+        берётся из пула, как в transaction().
+        """
+        if self.pool is not None:
+            with self.transaction(readonly=readonly) as conn:
+                yield conn
+            return
+
+        conn = psycopg2.connect(**self._connect_params)
+        try:
+            conn.set_session(readonly=readonly)
+            yield conn
+            conn.commit()
+        finally:
+            # Незавершённая транзакция откатывается при закрытии
+            conn.close()
+
     # ===================== USERS =====================
 
     def add_user(
@@ -56,38 +361,38 @@ class Database:
         Добавление пользователя.
         Если логин уже существует — возвращает его user_id.
         """
-        try:
-            hashed_password = bcrypt.hashpw(
-                password.encode('utf-8'),
-                bcrypt.gensalt()
-            ).decode('utf-8')
+        with self.get_cursor() as cur:
+            try:
+                hashed_password = hash_password(password)
 
-            self.cursor.execute("""
-                INSERT INTO users (fio, phone, login, password, user_type)
-                VALUES (%s, %s, %s, %s, %s)
-                RETURNING user_id
-            """, (fio, phone, login, hashed_password, user_type))
+                cur.execute("""
+                    INSERT INTO users (fio, phone, login, password, user_type)
+                    VALUES (%s, %s, %s, %s, %s)
+                    RETURNING user_id
+                """, (fio, phone, login, hashed_password, user_type))
 
-            return self.cursor.fetchone()[0]
+                self._specialists_cache = None
+                return cur.fetchone()[0]
 
-        except Error:
-            # Пользователь уже существует — возвращаем его id
-            self.cursor.execute(
-                "SELECT user_id FROM users WHERE login = %s",
-                (login,)
-            )
-            row = self.cursor.fetchone()
-            return row[0] if row else None
+            except Error:
+                # Пользователь уже существует — возвращаем его id
+                cur.execute(
+                    "SELECT user_id FROM users WHERE login = %s",
+                    (login,)
+                )
+                row = cur.fetchone()
+                return row[0] if row else None
 
     def authenticate_user(self, login: str, password: str) -> Optional[Dict]:
         try:
-            self.cursor.execute("""
-                SELECT user_id, fio, phone, login, user_type, password
-                FROM users
-                WHERE login = %s
-            """, (login,))
+            with self.get_cursor() as cur:
+                cur.execute("""
+                    SELECT user_id, fio, phone, login, user_type, password
+                    FROM users
+                    WHERE login = %s
+                """, (login,))
+                row = cur.fetchone()
 
-            row = self.cursor.fetchone()
             if row and bcrypt.checkpw(password.encode(), row[5].encode()):
                 return {
                     'user_id': row[0],
@@ -103,12 +408,58 @@ class Database:
             return None
 
     def get_all_users(self) -> List[Dict]:
-        self.cursor.execute("""
-            SELECT user_id, fio, phone, login, user_type
-            FROM users
-            ORDER BY user_id
-        """)
-        return [
+        with self.get_cursor() as cur:
+            cur.execute("""
+                SELECT user_id, fio, phone, login, user_type
+                FROM users
+                ORDER BY user_id
+            """)
+            return [
+                {
+                    'user_id': r[0],
+                    'id': r[0],  # Добавляем алиас id для совместимости
+                    'fio': r[1],
+                    'phone': r[2],
+                    'login': r[3],
+                    'user_type': r[4]
+                }
+                for r in cur.fetchall()
+            ]
+
+    def get_users_page(
+        self,
+        after_id: Optional[int] = None,
+        limit: int = 100,
+        user_type: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[int]]:
+        """Страница пользователей по возрастанию user_id (keyset).
+
+        Формат пользователей как у get_all_users. С фильтром user_type
+        читается по индексу idx_users_type_id (user_type, user_id).
+
+        Returns:
+            (пользователи, курсор следующей страницы или None)
+        """
+        conditions = []
+        params = []
+        if user_type:
+            conditions.append("user_type = %s")
+            params.append(user_type)
+        if after_id is not None:
+            conditions.append("user_id > %s")
+            params.append(after_id)
+
+        query = "SELECT user_id, fio, phone, login, user_type FROM users"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY user_id LIMIT %s"
+        params.append(limit + 1)
+
+        with self.get_cursor() as cur:
+            cur.execute(query, params)
+            rows = cur.fetchall()
+
+        users = [
             {
                 'user_id': r[0],
                 'id': r[0],  # Добавляем алиас id для совместимости
@@ -117,15 +468,19 @@ class Database:
                 'login': r[3],
                 'user_type': r[4]
             }
-            for r in self.cursor.fetchall()
+            for r in rows[:limit]
         ]
+        next_after_id = users[-1]['user_id'] if len(rows) > limit else None
+        return users, next_after_id
 
     def delete_user(self, user_id: int) -> bool:
         try:
-            self.cursor.execute(
-                "DELETE FROM users WHERE user_id = %s",
-                (user_id,)
-            )
+            with self.get_cursor() as cur:
+                cur.execute(
+                    "DELETE FROM users WHERE user_id = %s",
+                    (user_id,)
+                )
+            self._specialists_cache = None
             return True
         except Error:
             return False
@@ -133,27 +488,41 @@ class Database:
     def set_user_role(self, user_id: int, new_role: str) -> bool:
         """Установка новой роли для пользователя (только для Администратора)"""
         try:
-            self.cursor.execute(
-                "UPDATE users SET user_type = %s WHERE user_id = %s",
-                (new_role, user_id)
-            )
-            return self.cursor.rowcount > 0
+            with self.get_cursor() as cur:
+                cur.execute(
+                    "UPDATE users SET user_type = %s WHERE user_id = %s",
+                    (new_role, user_id)
+                )
+                self._specialists_cache = None
+                return cur.rowcount > 0
         except Error as e:
             print(f"set_user_role error: {e}")
             return False
 
     def get_specialists(self) -> List[Dict]:
         """Получение списка специалистов"""
-        self.cursor.execute("""
-            SELECT user_id, fio, phone
-            FROM users
-            WHERE user_type = 'Специалист'
-            ORDER BY fio
-        """)
-        return [
-            {'user_id': r[0], 'fio': r[1], 'phone': r[2]}
-            for r in self.cursor.fetchall()
-        ]
+        with self.get_cursor() as cur:
+            cur.execute("""
+                SELECT user_id, fio, phone
+                FROM users
+                WHERE user_type = 'Специалист'
+                ORDER BY fio
+            """)
+            specialists = [
+                {'user_id': r[0], 'fio': r[1], 'phone': r[2]}
+                for r in cur.fetchall()
+            ]
+
+        self._specialists_cache = (time.monotonic(), specialists)
+        return specialists
+
+    def get_specialists_cached(self) -> List[Dict]:
+        """Список специалистов из кэша (обновляется раз в
+        SPECIALISTS_CACHE_TTL секунд и после изменения пользователей)"""
+        cache = self._specialists_cache
+        if cache is not None and time.monotonic() - cache[0] < SPECIALISTS_CACHE_TTL:
+            return list(cache[1])
+        return self.get_specialists()
 
     # Алиас для совместимости с test_system.py
     def get_masters(self) -> List[Dict]:
@@ -170,44 +539,80 @@ class Database:
         client_id: int
     ) -> Optional[int]:
         try:
-            self.cursor.execute("""
-                INSERT INTO requests (
+            with self.get_cursor() as cur:
+                cur.execute("""
+                    INSERT INTO requests (
+                        climate_tech_type,
+                        climate_tech_model,
+                        problem_description,
+                        client_id,
+                        request_status,
+                        start_date,
+                        due_date
+                    )
+                    VALUES (%s, %s, %s, %s, %s, CURRENT_DATE, CURRENT_DATE + 7)
+                    RETURNING request_id
+                """, (
                     climate_tech_type,
                     climate_tech_model,
                     problem_description,
                     client_id,
-                    request_status,
-                    start_date,
-                    due_date
-                )
-                VALUES (%s, %s, %s, %s, %s, CURRENT_DATE, CURRENT_DATE + 7)
-                RETURNING request_id
-            """, (
-                climate_tech_type,
-                climate_tech_model,
-                problem_description,
-                client_id,
-                'Новая заявка'
-            ))
-            return self.cursor.fetchone()[0]
+                    'Новая заявка'
+                ))
+                return cur.fetchone()[0]
 
         except Error as e:
             print(f"add_request error: {e}")
             return None
 
+    @staticmethod
+    def _request_from_row(r) -> Dict:
+        """Строка REQUESTS_SELECT -> словарь заявки"""
+        return {
+            'request_id': r[0],
+            'id': r[0],  # Добавляем алиас id для совместимости
+            'start_date': r[1],
+            'climate_tech_type': r[2],
+            'climate_tech_model': r[3],
+            'problem_description': r[4],
+            'request_status': r[5],
+            'due_date': r[6],
+            'completion_date': r[7],
+            'client_name': r[8],
+            'master_name': r[9],
+            'client_id': r[10],
+            'master_id': r[11]
+        }
+
     def get_all_requests(self, status: Optional[str] = None) -> List[Dict]:
-        query = """
-            SELECT r.request_id, r.start_date, r.climate_tech_type,
-                   r.climate_tech_model, r.problem_description,
-                   r.request_status,
-                   r.due_date,
-                   r.completion_date,
-                   u_client.fio,
-                   u_master.fio
-            FROM requests r
-            JOIN users u_client ON r.client_id = u_client.user_id
-            LEFT JOIN users u_master ON r.master_id = u_master.user_id
+        query = REQUESTS_SELECT
+
+        params = ()
+        if status:
+            query += " WHERE r.request_status = %s"
+            params = (status,)
+
+        query += " ORDER BY r.request_id DESC"
+
+        with self.get_cursor() as cur:
+            cur.execute(query, params)
+            return [self._request_from_row(r) for r in cur.fetchall()]
+
+    def iter_requests(
+        self,
+        status: Optional[str] = None,
+        batch_size: int = 2000
+    ) -> Iterator[Dict]:
+        """Потоковая выдача заявок (тот же порядок и формат, что у get_all_requests).
+
+        Использует именованный (серверный) курсор: строки приходят пачками
+        по batch_size, поэтому память не растёт с размером таблицы, а первые
+        строки доступны сразу. Выдача идёт на своём соединении
+        (stream_transaction), которое занято, пока генератор не исчерпан
+        или не закрыт; изменения, сделанные вызывающим кодом по ходу
+        чтения, от выдачи не зависят.
         """
+        query = REQUESTS_SELECT
 
         params = ()
         if status:
@@ -216,86 +621,383 @@ class Database:
 
         query += " ORDER BY r.request_id DESC"
 
-        self.cursor.execute(query, params)
+        with self.stream_transaction() as conn:
+            with conn.cursor(name=f"requests_stream_{uuid.uuid4().hex}") as cur:
+                cur.itersize = batch_size
+                cur.execute(query, params)
+                while True:
+                    rows = cur.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for r in rows:
+                        yield self._request_from_row(r)
 
-        return [
-            {
-                'request_id': r[0],
-                'id': r[0],  # Добавляем алиас id для совместимости
-                'start_date': r[1],
-                'climate_tech_type': r[2],
-                'climate_tech_model': r[3],
-                'problem_description': r[4],
-                'request_status': r[5],
-                'client_name': r[6],
-                'master_name': r[7]
-            }
-            for r in self.cursor.fetchall()
-        ]
+    def _requests_page(
+        self,
+        conditions: List[str],
+        params: List,
+        after_id: Optional[int],
+        limit: Optional[int]
+    ) -> Tuple[List[Dict], Optional[int]]:
+        """Keyset-страница REQUESTS_SELECT по убыванию request_id.
+
+        limit=None — все строки после after_id одной страницей.
+        """
+        conditions = list(conditions)
+        params = list(params)
+        if after_id is not None:
+            conditions.append("r.request_id < %s")
+            params.append(after_id)
+
+        query = REQUESTS_SELECT
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY r.request_id DESC"
+        if limit is not None:
+            # Лишняя строка показывает, есть ли следующая страница
+            query += " LIMIT %s"
+            params.append(limit + 1)
+
+        with self.get_cursor() as cur:
+            cur.execute(query, params)
+            rows = cur.fetchall()
+
+        if limit is None:
+            return [self._request_from_row(r) for r in rows], None
+
+        page = [self._request_from_row(r) for r in rows[:limit]]
+        next_after_id = page[-1]['request_id'] if len(rows) > limit else None
+        return page, next_after_id
+
+    def get_requests_page(
+        self,
+        after_id: Optional[int] = None,
+        limit: int = 100,
+        status: Optional[str] = None,
+        master_id: Optional[int] = None,
+        date_from=None,
+        date_to=None
+    ) -> Tuple[List[Dict], Optional[int]]:
+        """Страница заявок по ключу (keyset), от новых к старым.
+
+        Args:
+            after_id: курсор продолжения из предыдущего вызова
+                (None — первая страница)
+            limit: размер страницы
+            status: фильтр по request_status
+            master_id: фильтр по мастеру (NO_MASTER — без мастера)
+            date_from, date_to: границы start_date включительно
+
+        Returns:
+            (заявки, курсор следующей страницы или None, если страниц больше нет)
+
+        Вместо OFFSET используется условие request_id < after_id по индексу
+        (PK или idx_requests_status_id), поэтому любая страница стоит
+        столько же, сколько первая.
+        """
+        conditions = []
+        params = []
+        if status:
+            conditions.append("r.request_status = %s")
+            params.append(status)
+        if master_id == NO_MASTER:
+            conditions.append("r.master_id IS NULL")
+        elif master_id is not None:
+            conditions.append("r.master_id = %s")
+            params.append(master_id)
+        if date_from is not None:
+            conditions.append("r.start_date >= %s")
+            params.append(date_from)
+        if date_to is not None:
+            conditions.append("r.start_date <= %s")
+            params.append(date_to)
+        return self._requests_page(conditions, params, after_id, limit)
+
+    def get_requests_for_client(
+        self,
+        user_id: int,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[List[Dict], Optional[int]]:
+        """Заявки заказчика (по client_id, индекс idx_requests_client).
+
+        Пагинация как у get_requests_page; limit=None — все заявки сразу.
+        """
+        return self._requests_page(
+            ["r.client_id = %s"], [user_id], after_id, limit
+        )
+
+    def get_requests_for_master(
+        self,
+        user_id: int,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[List[Dict], Optional[int]]:
+        """Заявки, назначенные специалисту (по master_id, индекс idx_requests_master).
+
+        Пагинация как у get_requests_page; limit=None — все заявки сразу.
+        """
+        return self._requests_page(
+            ["r.master_id = %s"], [user_id], after_id, limit
+        )
+
+    def get_unassigned_requests(
+        self,
+        limit: Optional[int] = 100,
+        after: Optional[Tuple] = None
+    ) -> Tuple[List[Dict], Optional[Tuple]]:
+        """Заявки без назначенного специалиста, по возрастанию срока (due_date).
+
+        Читаются по частичному индексу idx_requests_unassigned
+        (WHERE master_id IS NULL), поэтому стоимость зависит только от
+        числа неназначенных заявок. Пагинация по ключу: after — курсор
+        (due_date, request_id) последней заявки предыдущей страницы, как
+        в get_comments_page; limit=None — все сразу. Заявки без срока
+        идут в конце.
+        """
+        query = REQUESTS_SELECT + " WHERE r.master_id IS NULL"
+        params = []
+        if after is not None:
+            query += """
+                AND (COALESCE(r.due_date, 'infinity'::date), r.request_id)
+                    > (COALESCE(%s::date, 'infinity'::date), %s)
+            """
+            params.extend(after)
+        query += " ORDER BY COALESCE(r.due_date, 'infinity'::date), r.request_id"
+        if limit is not None:
+            query += " LIMIT %s"
+            params.append(limit + 1)
+
+        with self.get_cursor() as cur:
+            cur.execute(query, params)
+            rows = cur.fetchall()
+
+        if limit is None:
+            return [self._request_from_row(r) for r in rows], None
+
+        page = [self._request_from_row(r) for r in rows[:limit]]
+        next_after = (page[-1]['due_date'], page[-1]['request_id']) if len(rows) > limit else None
+        return page, next_after
 
     def get_request_by_id(self, request_id: int) -> Optional[Dict]:
-        self.cursor.execute("""
-            SELECT r.request_id, r.start_date, r.climate_tech_type,
-                   r.climate_tech_model, r.problem_description,
-                   r.request_status,
-                   r.due_date,
-                   r.completion_date,
-                   u_client.fio,
-                   u_master.fio
-            FROM requests r
-            JOIN users u_client ON r.client_id = u_client.user_id
-            LEFT JOIN users u_master ON r.master_id = u_master.user_id
-            WHERE r.request_id = %s
-        """, (request_id,))
-
-        r = self.cursor.fetchone()
+        with self.get_cursor() as cur:
+            cur.execute(
+                REQUESTS_SELECT + " WHERE r.request_id = %s",
+                (request_id,)
+            )
+            r = cur.fetchone()
+
+        return self._request_from_row(r) if r else None
+
+    def get_request_details(
+        self,
+        request_id: int,
+        comments_limit: int = 50,
+        with_specialists: bool = True
+    ) -> Optional[Dict]:
+        """Всё для окна заявки одним запросом.
+
+        Заявка, её последние comments_limit комментариев и (если кэш
+        get_specialists_cached устарел) список специалистов собираются
+        в одной строке: комментарии и специалисты — json_agg в
+        подзапросах.
+
+        Returns:
+            {'request': ..., 'comments': [...], 'comments_after': курсор
+            для get_comments_page или None, 'specialists': [...]}
+            или None, если заявки нет
+        """
+        cache = self._specialists_cache
+        need_specialists = with_specialists and (
+            cache is None or time.monotonic() - cache[0] >= SPECIALISTS_CACHE_TTL
+        )
+        specialists_sql = """
+            (SELECT json_agg(json_build_object(
+                        'user_id', user_id, 'fio', fio, 'phone', phone
+                    ) ORDER BY fio)
+             FROM users
+             WHERE user_type = 'Специалист')
+        """ if need_specialists else "NULL"
+
+        with self.get_cursor() as cur:
+            cur.execute(
+                "SELECT" + REQUESTS_FIELDS + """,
+                    (SELECT json_agg(json_build_object(
+                                'comment_id', c.comment_id,
+                                'message', c.message,
+                                'created_at', c.created_at,
+                                'master_name', c.fio
+                            ) ORDER BY c.created_at DESC, c.comment_id DESC)
+                     FROM (
+                        SELECT c.comment_id, c.message, c.created_at, u.fio
+                        FROM comments c
+                        JOIN users u ON c.master_id = u.user_id
+                        WHERE c.request_id = r.request_id
+                        ORDER BY c.created_at DESC, c.comment_id DESC
+                        LIMIT %s
+                     ) c),
+                    """ + specialists_sql + REQUESTS_FROM + """
+                WHERE r.request_id = %s
+                """,
+                (comments_limit + 1, request_id)
+            )
+            r = cur.fetchone()
+
         if not r:
             return None
 
+        comments = r[-2] or []
+        for comment in comments:
+            if comment['created_at']:
+                comment['created_at'] = datetime.datetime.fromisoformat(comment['created_at'])
+        comments_after = None
+        if len(comments) > comments_limit:
+            comments = comments[:comments_limit]
+            comments_after = (comments[-1]['created_at'], comments[-1]['comment_id'])
+
+        if need_specialists:
+            specialists = r[-1] or []
+            self._specialists_cache = (time.monotonic(), specialists)
+            specialists = list(specialists)
+        elif with_specialists:
+            specialists = list(cache[1])
+        else:
+            specialists = []
+
         return {
-            'request_id': r[0],
-            'id': r[0],  # Добавляем алиас id для совместимости
-            'start_date': r[1],
-            'climate_tech_type': r[2],
-            'climate_tech_model': r[3],
-            'problem_description': r[4],
-            'request_status': r[5],
-            'due_date': r[6],
-            'completion_date': r[7],
-            'client_name': r[8],
-            'master_name': r[9]
+            'request': self._request_from_row(r[:-2]),
+            'comments': comments,
+            'comments_after': comments_after,
+            'specialists': specialists
         }
 
+    def get_requests_changed_since(
+        self,
+        since: Optional[datetime.datetime]
+    ) -> Tuple[List[Dict], datetime.datetime]:
+        """Заявки, созданные или изменённые после since (по updated_at,
+        индекс idx_requests_updated) — для обновления уже загруженных данных.
+
+        Args:
+            since: метка из предыдущего вызова; None — только получить метку
+
+        Returns:
+            (заявки в формате get_all_requests, метка для следующего вызова)
+
+        Удалённые заявки не возвращаются. Долгая транзакция (импорт --bulk,
+        массовое изменение) держит метку на своём начале, пока не завершится:
+        до тех пор одни и те же заявки приходят повторно, но не теряются.
+        Роль приложения должна видеть xact_start чужих сеансов в
+        pg_stat_activity (тот же пользователь или pg_read_all_stats).
+        """
+        with self.transaction(isolation_level='REPEATABLE READ', readonly=True) as conn:
+            with conn.cursor() as cur:
+                # Не позже момента снимка, который видит запрос, и начала
+                # транзакций, которые ещё могут закоммитить изменения
+                cur.execute(SYNC_WATERMARK_SQL)
+                watermark = cur.fetchone()[0]
+                if since is None:
+                    return [], watermark
+
+                cur.execute(
+                    REQUESTS_SELECT + """
+                    WHERE r.updated_at >= %s
+                    ORDER BY r.updated_at
+                    """,
+                    (since,)
+                )
+                return [self._request_from_row(r) for r in cur.fetchall()], watermark
+
+    def get_requests_by_ids(self, request_ids: List[int]) -> List[Dict]:
+        """Заявки по списку ID одним запросом (для обновления строк в GUI
+        после изменения). Несуществующие ID пропускаются."""
+        if not request_ids:
+            return []
+        with self.get_cursor() as cur:
+            cur.execute(
+                REQUESTS_SELECT + " WHERE r.request_id = ANY(%s)",
+                (list(request_ids),)
+            )
+            return [self._request_from_row(r) for r in cur.fetchall()]
+
     def assign_master(self, request_id: int, master_id: int) -> bool:
         """
         Назначение мастера.
         Нельзя назначить мастера на завершённую заявку.
         """
         try:
-            self.cursor.execute("""
-                UPDATE requests
-                SET master_id = %s,
-                    request_status = 'В процессе ремонта'
-                WHERE request_id = %s
-                  AND request_status != 'Готова к выдаче'
-            """, (master_id, request_id))
-            return self.cursor.rowcount > 0
+            with self.get_cursor() as cur:
+                cur.execute("""
+                    UPDATE requests
+                    SET master_id = %s,
+                        request_status = 'В процессе ремонта'
+                    WHERE request_id = %s
+                      AND request_status != 'Готова к выдаче'
+                """, (master_id, request_id))
+                return cur.rowcount > 0
         except Error as e:
             print(f"assign_master error: {e}")
             return False
 
+    def claim_next_requests(
+        self,
+        master_id: int,
+        n: int = 1,
+        tech_type: Optional[str] = None
+    ) -> List[int]:
+        """Атомарно забирает в работу до n неназначенных заявок с ближайшим сроком.
+
+        Строки, которые в этот момент забирает другой специалист, пропускаются
+        (FOR UPDATE SKIP LOCKED), поэтому параллельные вызовы не ждут друг
+        друга и не получают одну и ту же заявку.
+
+        Args:
+            master_id: ID специалиста
+            n: сколько заявок забрать
+            tech_type: только заявки с таким climate_tech_type
+
+        Returns:
+            список ID полученных заявок (может быть короче n или пустым)
+        """
+        type_filter = "AND climate_tech_type = %(tech_type)s" if tech_type else ""
+        try:
+            with self.get_cursor() as cur:
+                cur.execute(f"""
+                    WITH picked AS (
+                        SELECT request_id
+                        FROM requests
+                        WHERE master_id IS NULL
+                          AND request_status != 'Готова к выдаче'
+                          {type_filter}
+                        ORDER BY COALESCE(due_date, 'infinity'::date), request_id
+                        LIMIT %(n)s
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    UPDATE requests r
+                    SET master_id = %(master_id)s,
+                        request_status = 'В процессе ремонта'
+                    FROM picked
+                    WHERE r.request_id = picked.request_id
+                    RETURNING r.request_id
+                """, {'n': n, 'master_id': master_id, 'tech_type': tech_type})
+                return sorted(row[0] for row in cur.fetchall())
+        except Error as e:
+            print(f"claim_next_requests error: {e}")
+            return []
+
     def update_request_status(self, request_id: int, new_status: str) -> bool:
         try:
-            self.cursor.execute("""
-                UPDATE requests
-                SET request_status = %s,
-                    completion_date = CASE
-                        WHEN %s = 'Готова к выдаче'
-                        THEN CURRENT_DATE
-                        ELSE completion_date
-                    END
-                WHERE request_id = %s
-            """, (new_status, new_status, request_id))
+            with self.get_cursor() as cur:
+                cur.execute("""
+                    UPDATE requests
+                    SET request_status = %s,
+                        completion_date = CASE
+                            WHEN %s = 'Готова к выдаче'
+                            THEN CURRENT_DATE
+                            ELSE completion_date
+                        END
+                    WHERE request_id = %s
+                """, (new_status, new_status, request_id))
             return True
         except Error:
             return False
@@ -308,56 +1010,182 @@ class Database:
             new_due_date: дата (datetime.date) или строка 'YYYY-MM-DD'
         """
         try:
-            self.cursor.execute(
-                """
-                UPDATE requests
-                SET due_date = %s
-                WHERE request_id = %s
-                  AND request_status != 'Готова к выдаче'
-                """,
-                (new_due_date, request_id)
-            )
-            return self.cursor.rowcount > 0
+            with self.get_cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE requests
+                    SET due_date = %s
+                    WHERE request_id = %s
+                      AND request_status != 'Готова к выдаче'
+                    """,
+                    (new_due_date, request_id)
+                )
+                return cur.rowcount > 0
         except Error as e:
             print(f"update_due_date error: {e}")
             return False
 
+    # ===================== BULK UPDATES =====================
+
+    def _bulk_update(self, sql: str, rows: List[tuple], template: str) -> Dict[int, bool]:
+        """Выполняет UPDATE ... FROM (VALUES %s) ... RETURNING request_id
+        одним запросом в одной транзакции.
+
+        Returns:
+            {request_id: True, если строка обновлена, иначе False}
+        """
+        outcome = {row[0]: False for row in rows}
+        if not rows:
+            return outcome
+
+        try:
+            with self.transaction() as conn:
+                with conn.cursor() as cur:
+                    updated = extras.execute_values(
+                        cur, sql, rows,
+                        template=template,
+                        page_size=len(rows),
+                        fetch=True
+                    )
+            for (request_id,) in updated:
+                outcome[request_id] = True
+        except Error as e:
+            print(f"bulk update error: {e}")
+        return outcome
+
+    def bulk_assign_master(self, request_ids: List[int], master_id: int) -> Dict[int, bool]:
+        """Групповое назначение мастера (завершённые заявки не меняются)"""
+        return self._bulk_update("""
+            UPDATE requests r
+            SET master_id = v.master_id,
+                request_status = 'В процессе ремонта'
+            FROM (VALUES %s) AS v(request_id, master_id)
+            WHERE r.request_id = v.request_id
+              AND r.request_status != 'Готова к выдаче'
+            RETURNING r.request_id
+        """, [(request_id, master_id) for request_id in request_ids], "(%s, %s)")
+
+    def bulk_update_status(self, request_ids: List[int], new_status: str) -> Dict[int, bool]:
+        """Групповая смена статуса (с проставлением completion_date, как в update_request_status)"""
+        return self._bulk_update("""
+            UPDATE requests r
+            SET request_status = v.new_status,
+                completion_date = CASE
+                    WHEN v.new_status = 'Готова к выдаче'
+                    THEN CURRENT_DATE
+                    ELSE r.completion_date
+                END
+            FROM (VALUES %s) AS v(request_id, new_status)
+            WHERE r.request_id = v.request_id
+            RETURNING r.request_id
+        """, [(request_id, new_status) for request_id in request_ids], "(%s, %s)")
+
+    def bulk_update_due_date(self, request_ids: List[int], new_due_date) -> Dict[int, bool]:
+        """Групповое продление срока (завершённые заявки не меняются).
+
+        Args:
+            request_ids: ID заявок
+            new_due_date: дата (datetime.date) или строка 'YYYY-MM-DD'
+        """
+        return self._bulk_update("""
+            UPDATE requests r
+            SET due_date = v.due_date
+            FROM (VALUES %s) AS v(request_id, due_date)
+            WHERE r.request_id = v.request_id
+              AND r.request_status != 'Готова к выдаче'
+            RETURNING r.request_id
+        """, [(request_id, new_due_date) for request_id in request_ids], "(%s, %s::date)")
+
     # ===================== COMMENTS =====================
 
     def add_comment(self, message: str, master_id: int, request_id: int) -> bool:
         try:
-            self.cursor.execute("""
-                INSERT INTO comments (
-                    message,
-                    master_id,
-                    request_id,
-                    created_at
-                )
-                VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
-            """, (message, master_id, request_id))
+            with self.get_cursor() as cur:
+                cur.execute("""
+                    INSERT INTO comments (
+                        message,
+                        master_id,
+                        request_id,
+                        created_at
+                    )
+                    VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+                """, (message, master_id, request_id))
             return True
         except Error as e:
             print(f"add_comment error: {e}")
             return False
 
     def get_comments_by_request(self, request_id: int) -> List[Dict]:
-        self.cursor.execute("""
+        with self.get_cursor() as cur:
+            cur.execute("""
+                SELECT c.comment_id, c.message, c.created_at, u.fio
+                FROM comments c
+                JOIN users u ON c.master_id = u.user_id
+                WHERE c.request_id = %s
+                ORDER BY c.created_at DESC
+            """, (request_id,))
+
+            return [
+                {
+                    'comment_id': r[0],
+                    'message': r[1],
+                    'created_at': r[2],
+                    'master_name': r[3]
+                }
+                for r in cur.fetchall()
+            ]
+
+    def get_comments_page(
+        self,
+        request_id: int,
+        after: Optional[Tuple] = None,
+        limit: int = 50
+    ) -> Tuple[List[Dict], Optional[Tuple]]:
+        """Страница комментариев заявки, от новых к старым (keyset).
+
+        Args:
+            after: курсор (created_at, comment_id) из предыдущего вызова
+                или из get_request_details; None — первая страница
+            limit: размер страницы
+
+        Returns:
+            (комментарии в формате get_comments_by_request,
+             курсор следующей страницы или None)
+
+        Читается по индексу idx_comments_request_created
+        (request_id, created_at, comment_id): каждая страница — короткий
+        проход по индексу, независимо от числа комментариев.
+        """
+        query = """
             SELECT c.comment_id, c.message, c.created_at, u.fio
             FROM comments c
             JOIN users u ON c.master_id = u.user_id
             WHERE c.request_id = %s
-            ORDER BY c.created_at DESC
-        """, (request_id,))
+        """
+        params = [request_id]
+        if after is not None:
+            query += " AND (c.created_at, c.comment_id) < (%s, %s)"
+            params.extend(after)
+        query += " ORDER BY c.created_at DESC, c.comment_id DESC LIMIT %s"
+        params.append(limit + 1)
 
-        return [
+        with self.get_cursor() as cur:
+            cur.execute(query, params)
+            rows = cur.fetchall()
+
+        comments = [
             {
                 'comment_id': r[0],
                 'message': r[1],
                 'created_at': r[2],
                 'master_name': r[3]
             }
-            for r in self.cursor.fetchall()
+            for r in rows[:limit]
         ]
+        next_after = None
+        if len(rows) > limit:
+            next_after = (comments[-1]['created_at'], comments[-1]['comment_id'])
+        return comments, next_after
 
     # ===================== SEARCH =====================
 
@@ -365,96 +1193,262 @@ class Database:
         try:
             pattern = f"%{search_term}%"
 
-            self.cursor.execute("""
-                SELECT r.request_id, r.start_date, r.climate_tech_type,
-                       r.climate_tech_model, r.problem_description,
-                       r.request_status,
-                       u_client.fio, u_client.phone,
-                       u_master.fio
-                FROM requests r
-                JOIN users u_client ON r.client_id = u_client.user_id
-                LEFT JOIN users u_master ON r.master_id = u_master.user_id
-                WHERE
-                    r.request_id::TEXT LIKE %s OR
-                    r.climate_tech_type ILIKE %s OR
-                    r.climate_tech_model ILIKE %s OR
-                    r.problem_description ILIKE %s OR
-                    u_client.fio ILIKE %s OR
-                    u_client.phone LIKE %s
-                ORDER BY r.request_id DESC
-            """, (pattern,) * 6)
+            with self.get_cursor() as cur:
+                cur.execute("SELECT" + REQUESTS_FIELDS + ", u_client.phone" + REQUESTS_FROM + """
+                    WHERE
+                        r.request_id::TEXT LIKE %s OR
+                        r.climate_tech_type ILIKE %s OR
+                        r.climate_tech_model ILIKE %s OR
+                        r.problem_description ILIKE %s OR
+                        u_client.fio ILIKE %s OR
+                        u_client.phone LIKE %s
+                    ORDER BY r.request_id DESC
+                """, (pattern,) * 6)
 
-            return [
-                {
-                    'request_id': r[0],
-                    'id': r[0],  # Добавляем алиас id для совместимости
-                    'start_date': r[1],
-                    'climate_tech_type': r[2],
-                    'climate_tech_model': r[3],
-                    'problem_description': r[4],
-                    'request_status': r[5],
-                    'client_name': r[6],
-                    'client_phone': r[7],
-                    'master_name': r[8]
-                }
-                for r in self.cursor.fetchall()
-            ]
+                return [
+                    {**self._request_from_row(r), 'client_phone': r[12]}
+                    for r in cur.fetchall()
+                ]
 
         except Error as e:
             print(f"search_requests error: {e}")
             return []
 
-    # ===================== STATISTICS =====================
+    def search_requests_ranked(
+        self,
+        search_term: str,
+        limit: int = 100,
+        timeout_ms: int | None = None,
+        handle: QueryHandle | None = None
+    ) -> List[Dict]:
+        """Поиск заявок по триграммным индексам с ранжированием.
+
+        Кандидаты отбираются отдельными подзапросами по заявкам и по
+        клиентам (каждый обслуживается GIN-индексом pg_trgm), затем
+        сортируются по word_similarity и обрезаются до limit.
+        Номер заявки ищется точным совпадением, если запрос — число.
+        Формат результата как у search_requests, плюс поле 'rank'.
+
+        Args:
+            timeout_ms: statement_timeout для этого запроса
+            handle: QueryHandle для отмены запроса из другого потока
+
+        Raises:
+            QueryCanceledError: запрос отменён через handle или превысил
+                timeout_ms (в этом случае медленный запасной поиск не
+                выполняется)
+        """
+        pattern = f"%{search_term}%"
+        exact_id = int(search_term) if search_term.isdigit() else None
 
-    def get_statistics(self) -> Dict:
         try:
-            stats = {}
+            with self.transaction(readonly=True) as conn, conn.cursor() as cur:
+                if timeout_ms:
+                    cur.execute("SET LOCAL statement_timeout = %s", (int(timeout_ms),))
+                with handle.attached(conn, self.discard_connection) if handle else nullcontext():
+                    cur.execute("""
+                        WITH matches AS (
+                            SELECT request_id
+                            FROM requests
+                            WHERE climate_tech_type ILIKE %(pattern)s
+                               OR climate_tech_model ILIKE %(pattern)s
+                               OR problem_description ILIKE %(pattern)s
+                            UNION
+                            SELECT r.request_id
+                            FROM users u
+                            JOIN requests r ON r.client_id = u.user_id
+                            WHERE u.fio ILIKE %(pattern)s
+                               OR u.phone LIKE %(pattern)s
+                            UNION
+                            SELECT request_id
+                            FROM requests
+                            WHERE request_id = %(exact_id)s
+                        )
+                        SELECT""" + REQUESTS_FIELDS + """,
+                               u_client.phone,
+                               CASE WHEN r.request_id = %(exact_id)s THEN 1
+                               ELSE GREATEST(
+                                   word_similarity(%(term)s, r.climate_tech_type),
+                                   word_similarity(%(term)s, r.climate_tech_model),
+                                   word_similarity(%(term)s, r.problem_description),
+                                   word_similarity(%(term)s, u_client.fio),
+                                   word_similarity(%(term)s, u_client.phone)
+                               ) END AS rank
+                        FROM matches m
+                        JOIN requests r ON r.request_id = m.request_id
+                        JOIN users u_client ON r.client_id = u_client.user_id
+                        LEFT JOIN users u_master ON r.master_id = u_master.user_id
+                        ORDER BY rank DESC, r.request_id DESC
+                        LIMIT %(limit)s
+                    """, {
+                        'pattern': pattern,
+                        'term': search_term,
+                        'exact_id': exact_id,
+                        'limit': limit
+                    })
 
-            self.cursor.execute("SELECT COUNT(*) FROM requests")
-            stats['total_requests'] = self.cursor.fetchone()[0]
+                    return [
+                        {
+                            **self._request_from_row(r),
+                            'client_phone': r[12],
+                            'rank': float(r[13])
+                        }
+                        for r in cur.fetchall()
+                    ]
 
-            self.cursor.execute("""
-                SELECT COUNT(*) FROM requests
-                WHERE request_status = 'Готова к выдаче'
-            """)
-            stats['completed_requests'] = self.cursor.fetchone()[0]
+        except extensions.QueryCanceledError:
+            raise
+        except Error as e:
+            # Например, в БД не установлено расширение pg_trgm
+            print(f"search_requests_ranked error: {e}")
+            return self.search_requests(search_term)[:limit]
 
-            self.cursor.execute("""
-                SELECT AVG(completion_date - start_date)
-                FROM requests
-                WHERE completion_date IS NOT NULL
-            """)
-            avg_days = self.cursor.fetchone()[0]
-            stats['avg_completion_time'] = round(float(avg_days), 1) if avg_days else 0
-
-            self.cursor.execute("""
-                SELECT climate_tech_type, COUNT(*)
-                FROM requests
-                GROUP BY climate_tech_type
-                ORDER BY COUNT(*) DESC
-            """)
-            stats['by_tech_type'] = [
-                {'type': r[0], 'count': r[1]}
-                for r in self.cursor.fetchall()
-            ]
+    # ===================== STATISTICS =====================
 
-            self.cursor.execute("""
-                SELECT request_status, COUNT(*)
-                FROM requests
-                GROUP BY request_status
-            """)
-            stats['by_status'] = [
-                {'status': r[0], 'count': r[1]}
-                for r in self.cursor.fetchall()
-            ]
+    def get_statistics(self) -> Dict:
+        """Сводная статистика по заявкам.
+
+        Все показатели считаются одним запросом (GROUPING SETS) за один
+        проход по таблице в снимке REPEATABLE READ, поэтому цифры
+        согласованы между собой даже при параллельной записи.
+        """
+        try:
+            with self.transaction(isolation_level='REPEATABLE READ', readonly=True) as conn:
+                with conn.cursor() as cur:
+                    cur.execute("""
+                        SELECT climate_tech_type,
+                               request_status,
+                               GROUPING(climate_tech_type, request_status),
+                               COUNT(*),
+                               COUNT(*) FILTER (
+                                   WHERE request_status = 'Готова к выдаче'
+                               ),
+                               AVG(completion_date - start_date) FILTER (
+                                   WHERE completion_date IS NOT NULL
+                               )
+                        FROM requests
+                        GROUP BY GROUPING SETS (
+                            (), (climate_tech_type), (request_status)
+                        )
+                    """)
+                    rows = cur.fetchall()
 
+            stats = {
+                'total_requests': 0,
+                'completed_requests': 0,
+                'avg_completion_time': 0,
+                'by_tech_type': [],
+                'by_status': []
+            }
+
+            # GROUPING(): 3 — итог, 1 — по типу, 2 — по статусу
+            for tech_type, status, grouping, count, completed, avg_days in rows:
+                if grouping == 3:
+                    stats['total_requests'] = count
+                    stats['completed_requests'] = completed
+                    stats['avg_completion_time'] = round(float(avg_days), 1) if avg_days else 0
+                elif grouping == 1:
+                    stats['by_tech_type'].append({'type': tech_type, 'count': count})
+                elif grouping == 2:
+                    stats['by_status'].append({'status': status, 'count': count})
+
+            stats['by_tech_type'].sort(key=lambda item: item['count'], reverse=True)
             return stats
 
         except Error as e:
             print(f"get_statistics error: {e}")
             return {}
 
+    # ===================== EXPORT =====================
+
+    @staticmethod
+    def _export_query(
+        kind: str,
+        date_from=None,
+        date_to=None,
+        status: Optional[str] = None
+    ) -> Tuple[str, list]:
+        """Запрос выгрузки EXPORT_QUERIES[kind] с фильтрами по заявке:
+        start_date в [date_from, date_to] и request_status"""
+        if kind not in EXPORT_QUERIES:
+            raise ValueError(f"Неизвестная выгрузка: {kind}")
+
+        conditions = []
+        params = []
+        if date_from:
+            conditions.append("r.start_date >= %s")
+            params.append(date_from)
+        if date_to:
+            conditions.append("r.start_date <= %s")
+            params.append(date_to)
+        if status:
+            conditions.append("r.request_status = %s")
+            params.append(status)
+
+        query = EXPORT_QUERIES[kind]
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY 1"
+        return query, params
+
+    def export_csv(
+        self,
+        file,
+        kind: str = 'requests',
+        date_from=None,
+        date_to=None,
+        status: Optional[str] = None
+    ):
+        """Выгрузка в CSV (разделитель ';', с заголовком) через COPY ... TO STDOUT.
+
+        Строки пишутся в file сервером напрямую, без разбора в Python.
+
+        Args:
+            file: открытый файл (текстовый или бинарный) для записи
+            kind: 'requests' или 'comments'
+            date_from, date_to: границы start_date заявки
+            status: request_status заявки
+        """
+        query, params = self._export_query(kind, date_from, date_to, status)
+        with self.get_cursor() as cur:
+            # COPY не принимает параметры — подставляем их заранее
+            select = cur.mogrify(query, params).decode('utf-8')
+            cur.copy_expert(
+                f"COPY ({select}) TO STDOUT WITH (FORMAT csv, HEADER true, DELIMITER ';')",
+                file
+            )
+
+    def iter_export_batches(
+        self,
+        kind: str = 'requests',
+        date_from=None,
+        date_to=None,
+        status: Optional[str] = None,
+        batch_size: int = 10000
+    ) -> Iterator[Tuple[List[str], List[tuple]]]:
+        """Выгрузка пачками по batch_size строк через серверный курсор.
+
+        Yields:
+            (имена колонок, список кортежей) — для записи в Parquet/Arrow
+        """
+        query, params = self._export_query(kind, date_from, date_to, status)
+        with self.stream_transaction() as conn:
+            with conn.cursor(name=f"export_{kind}_{uuid.uuid4().hex}") as cur:
+                cur.itersize = batch_size
+                cur.execute(query, params)
+                columns = None
+                while True:
+                    rows = cur.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    if columns is None:
+                        columns = [column.name for column in cur.description]
+                    yield columns, rows
+
     def close(self):
-        self.cursor.close()
-        self.connection.close()
+        if self.pool is not None:
+            self.pool.closeall()
+        else:
+            self.cursor.close()
+            self.connection.close()
         print("Соединение с БД закрыто")
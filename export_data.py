@@ -0,0 +1,111 @@
+from database_module import Database, REQUEST_STATUSES
+import argparse
+import time
+
+
+def arrow_schema(kind: str, pa):
+    """Схема Arrow для выгрузки (совпадает с колонками EXPORT_QUERIES)"""
+    if kind == 'requests':
+        return pa.schema([
+            ('request_id', pa.int32()),
+            ('start_date', pa.date32()),
+            ('climate_tech_type', pa.string()),
+            ('climate_tech_model', pa.string()),
+            ('problem_description', pa.string()),
+            ('request_status', pa.string()),
+            ('due_date', pa.date32()),
+            ('completion_date', pa.date32()),
+            ('repair_parts', pa.string()),
+            ('client_id', pa.int32()),
+            ('client_name', pa.string()),
+            ('client_phone', pa.string()),
+            ('master_id', pa.int32()),
+            ('master_name', pa.string()),
+            ('created_at', pa.timestamp('us')),
+            ('updated_at', pa.timestamp('us')),
+        ])
+    return pa.schema([
+        ('comment_id', pa.int32()),
+        ('request_id', pa.int32()),
+        ('created_at', pa.timestamp('us')),
+        ('master_id', pa.int32()),
+        ('master_name', pa.string()),
+        ('message', pa.string()),
+    ])
+
+
+def export_csv(db: Database, kind: str, output: str, **filters) -> None:
+    """Выгрузка в CSV через COPY ... TO STDOUT (сервер пишет строки сам)"""
+    with open(output, 'wb') as file:
+        db.export_csv(file, kind, **filters)
+
+
+def export_arrow(db: Database, kind: str, output: str, fmt: str,
+                 batch_size: int = 10000, **filters) -> int:
+    """Выгрузка в Parquet или Arrow IPC пачками фиксированного размера.
+
+    Каждая пачка серверного курсора сразу превращается в RecordBatch
+    и записывается, поэтому память не зависит от объёма выгрузки.
+    Returns: число выгруженных строк.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Для выгрузки в Parquet/Arrow установите pyarrow: pip install pyarrow")
+
+    schema = arrow_schema(kind, pa)
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(output, schema)
+    else:
+        writer = pa.ipc.new_file(output, schema)
+
+    total = 0
+    try:
+        for columns, rows in db.iter_export_batches(kind, batch_size=batch_size, **filters):
+            arrays = [
+                pa.array(values, type=schema.field(name).type)
+                for name, values in zip(columns, zip(*rows))
+            ]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            total += len(rows)
+    finally:
+        writer.close()
+    return total
+
+
+def main():
+    """Выгрузка заявок или комментариев для аналитики"""
+    parser = argparse.ArgumentParser(description='Выгрузка данных из базы')
+    parser.add_argument('kind', choices=['requests', 'comments'], help='что выгружать')
+    parser.add_argument('--format', choices=['csv', 'parquet', 'arrow'], default='csv')
+    parser.add_argument('--output', help='файл выгрузки (по умолчанию <kind>.<format>)')
+    parser.add_argument('--from', dest='date_from', help='start_date заявки с (YYYY-MM-DD)')
+    parser.add_argument('--to', dest='date_to', help='start_date заявки по (YYYY-MM-DD)')
+    parser.add_argument('--status', choices=REQUEST_STATUSES, help='статус заявки')
+    parser.add_argument('--batch-size', type=int, default=10000,
+                        help='размер пачки для Parquet/Arrow')
+    args = parser.parse_args()
+
+    output = args.output or f"{args.kind}.{args.format}"
+    filters = {'date_from': args.date_from, 'date_to': args.date_to, 'status': args.status}
+
+    db = Database()
+    try:
+        started = time.perf_counter()
+        if args.format == 'csv':
+            export_csv(db, args.kind, output, **filters)
+            print(f"✅ Выгрузка {args.kind} сохранена в {output} "
+                  f"за {time.perf_counter() - started:.2f} с")
+        else:
+            total = export_arrow(db, args.kind, output, args.format, args.batch_size, **filters)
+            print(f"✅ Выгружено строк: {total} в {output} "
+                  f"за {time.perf_counter() - started:.2f} с")
+    except Exception as e:
+        print(f"❌ Ошибка при выгрузке: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,43 +1,334 @@
-from database_module import Database
+from database_module import Database, USER_TYPES, REQUEST_STATUSES, hash_password
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from datetime import date, datetime
+from itertools import chain, islice
+from psycopg2 import sql, extras
+import argparse
 import csv
+import io
+import os
+import time
+
+# ===================== READERS =====================
+
+def iter_csv_rows(filename: str):
+    """Построчное чтение CSV (разделитель ';') в словари по заголовку"""
+    with open(filename, 'r', encoding='utf-8') as file:
+        yield from csv.DictReader(file, delimiter=';')
+
+
+def cell_to_text(value) -> str:
+    """Значение ячейки .xlsx -> строка в том же виде, что и в CSV"""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def iter_xlsx_rows(filename: str):
+    """Потоковое чтение первого листа .xlsx в словари по заголовку.
+
+    Книга открывается в режиме read_only, строки читаются по одной,
+    поэтому память не зависит от размера файла. Значения приводятся
+    к строкам, как в CSV (даты — 'YYYY-MM-DD').
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError("Для импорта .xlsx установите openpyxl: pip install openpyxl")
+
+    workbook = load_workbook(filename, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [cell_to_text(value).strip() for value in next(rows, ())]
+        for values in rows:
+            if all(value is None for value in values):
+                continue
+            yield {
+                column: cell_to_text(value)
+                for column, value in zip(header, values)
+                if column
+            }
+    finally:
+        workbook.close()
+
+
+def read_rows(filename: str):
+    """Строки файла данных (.csv или .xlsx) как словари с заголовками
+    исходного файла (startDate, climateTechType, masterID ...)"""
+    if filename.lower().endswith('.xlsx'):
+        return iter_xlsx_rows(filename)
+    return iter_csv_rows(filename)
+
+
+def iter_batches(rows, start: int, batch_size: int):
+    """Пакеты по batch_size строк [(номер строки данных, строка)],
+    начиная после первых start строк (нумерация с 1, без заголовка)"""
+    rows = enumerate(islice(rows, start, None), start=start + 1)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def is_null(value: str) -> bool:
+    """Пустое значение в исходных данных: '' или 'null'"""
+    return value in ('', 'null')
+
+
+# ===================== VALIDATION =====================
+
+def is_date(value: str) -> bool:
+    """Дата в формате YYYY-MM-DD"""
+    try:
+        date.fromisoformat(value)
+        return len(value) == 10
+    except ValueError:
+        return False
+
+
+def is_int(value: str) -> bool:
+    return value.isdigit()
+
+
+def known_ids(db: Database, table: str, column: str) -> set:
+    """Множество существующих ID (строками, как в исходных файлах)"""
+    with db.get_cursor() as cur:
+        cur.execute(sql.SQL("SELECT {}::text FROM {}").format(
+            sql.Identifier(column), sql.Identifier(table)
+        ))
+        return {r[0] for r in cur.fetchall()}
+
+
+def file_checks(kind: str, users: set | None = None, requests: set | None = None) -> list:
+    """Проверки колонок файла: (колонка, предикат, причина отказа).
+
+    users/requests — множества существующих ID для проверки внешних
+    ключей; None — внешние ключи не проверяются (режим --resumable
+    переводит их через import_id_map сам).
+    """
+    def required(column):
+        return (column, bool, 'пустое значение')
+
+    def reference(column, ids, nullable=False):
+        if ids is None:
+            return (column, lambda v: (nullable and is_null(v)) or is_int(v), 'не число')
+        return (column, lambda v: (nullable and is_null(v)) or v in ids, 'нет такой записи')
+
+    if kind == 'users':
+        return [
+            required('userID'),
+            required('fio'),
+            required('phone'),
+            required('login'),
+            required('password'),
+            ('type', lambda v: v in USER_TYPES, 'роль вне списка CHECK'),
+        ]
+    if kind == 'requests':
+        return [
+            required('requestID'),
+            ('startDate', is_date, 'некорректная дата'),
+            ('completionDate', lambda v: is_null(v) or is_date(v), 'некорректная дата'),
+            required('climateTechType'),
+            required('climateTechModel'),
+            required('problemDescryption'),
+            ('requestStatus', lambda v: v in REQUEST_STATUSES, 'статус вне списка CHECK'),
+            reference('clientID', users),
+            reference('masterID', users, nullable=True),
+        ]
+    if kind == 'comments':
+        return [
+            required('commentID'),
+            required('message'),
+            reference('masterID', users),
+            reference('requestID', requests),
+        ]
+    raise ValueError(f"неизвестный тип файла: {kind}")
+
+
+# Колонки, значения которых не должны повторяться внутри файла
+UNIQUE_COLUMNS = {
+    'users': ['userID', 'login'],
+    'requests': ['requestID'],
+    'comments': ['commentID'],
+}
+
+
+# Размер пакета, который проверяется целиком (в памяти — только он)
+VALIDATION_BATCH_SIZE = 10000
+
+
+def validate_rows(rows: list, checks: list, unique: list = (), seen: dict | None = None) -> list:
+    """Проверяет пакет строк сразу, по колонкам.
+
+    Каждая колонка собирается в список, предикат вычисляется один раз
+    на каждое различное значение, результат раздаётся строкам по
+    словарю. seen — {колонка: значения, принятые в прошлых пакетах};
+    дополняется значениями принятых строк, поэтому повтор уникального
+    значения отклоняется и тогда, когда первое вхождение было в другом
+    пакете. Returns: причины отказа для каждой строки (пустой список —
+    строка чистая).
+    """
+    seen = {column: set() for column in unique} if seen is None else seen
+    reasons = [[] for _ in rows]
+    columns = {
+        column: [row.get(column) or '' for row in rows]
+        for column in {check[0] for check in checks} | set(unique)
+    }
+
+    for column, predicate, message in checks:
+        values = columns[column]
+        verdicts = {value: predicate(value) for value in set(values)}
+        for i, value in enumerate(values):
+            if not verdicts[value]:
+                reasons[i].append(f"{column}: {message} ({value!r})")
+
+    for i, row_reasons in enumerate(reasons):
+        values = [(column, columns[column][i]) for column in unique]
+        for column, value in values:
+            if value and value in seen[column]:
+                row_reasons.append(f"{column}: повторяется в файле ({value!r})")
+        if not row_reasons:
+            for column, value in values:
+                if value:
+                    seen[column].add(value)
+    return reasons
+
+
+def reference_ids(db: Database, entity: str, references: str) -> set:
+    """ID, на которые могут ссылаться строки файла: 'tables' — ключи
+    таблицы в БД, 'import_id_map' — исходные ID уже загруженных строк"""
+    if references == 'import_id_map':
+        return set(load_id_map(db, entity))
+    return known_ids(db, f'{entity}s', f'{entity}_id')
+
+
+def check_batches(db: Database, kind: str, filename: str, start: int = 0,
+                  batch_size: int = VALIDATION_BATCH_SIZE, references: str | None = 'tables'):
+    """Читает файл пакетами и проверяет каждый пакет validate_rows.
+
+    В памяти одновременно один пакет; на весь файл хранятся только
+    множества ID для внешних ключей и уже принятых уникальных значений.
+    start — сколько строк файла пропустить (контрольная точка --resumable).
+    references — где искать ID внешних ключей ('tables', 'import_id_map');
+    None — не проверять.
+    Yields: [(номер строки данных, строка, причины отказа)]
+    """
+    users = requests = None
+    if references and kind in ('requests', 'comments'):
+        users = reference_ids(db, 'user', references)
+    if references and kind == 'comments':
+        requests = reference_ids(db, 'request', references)
+
+    checks = file_checks(kind, users, requests)
+    unique = UNIQUE_COLUMNS[kind]
+    seen = {column: set() for column in unique}
+    for batch in iter_batches(read_rows(filename), start, batch_size):
+        reasons = validate_rows([row for _, row in batch], checks, unique, seen)
+        yield [(number, row, row_reasons) for (number, row), row_reasons in zip(batch, reasons)]
+
+
+class RejectReport:
+    """Отчёт <файл>.rejected.csv, который пишется по мере проверки.
+
+    Файл создаётся при первой отклонённой строке, отчёт прошлого запуска
+    удаляется. В колонке line — номер строки исходного файла (заголовок —
+    строка 1).
+    """
+
+    def __init__(self, filename: str):
+        self.filename = f"{filename}.rejected.csv"
+        self.count = 0
+        self._file = None
+        self._writer = None
+        self._columns = None
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+    def add(self, number: int, row: dict, reasons: list):
+        """Отклонённая строка с номером number (нумерация iter_batches)"""
+        if self._file is None:
+            self._columns = list(row)
+            self._file = open(self.filename, 'w', encoding='utf-8', newline='')
+            self._writer = csv.writer(self._file, delimiter=';')
+            self._writer.writerow(['line'] + self._columns + ['reason'])
+        self._writer.writerow(
+            [number + 1] + [row.get(column) or '' for column in self._columns] + ['; '.join(reasons)]
+        )
+        self.count += 1
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        print(f"⚠️  Отклонено строк: {self.count} — подробности в {self.filename}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def load_valid_rows(db: Database, kind: str, filename: str, report: RejectReport | None = None,
+                    references: str | None = 'tables'):
+    """Этап проверки перед загрузкой: генератор чистых строк файла.
+
+    Отклонённые строки пишутся в report; без него — в собственный
+    RejectReport, который закрывается по окончании чтения.
+    references — как в check_batches.
+    """
+    with RejectReport(filename) if report is None else nullcontext(report) as report:
+        for batch in check_batches(db, kind, filename, references=references):
+            for number, row, reasons in batch:
+                if reasons:
+                    report.add(number, row, reasons)
+                else:
+                    yield row
+
+
+# ===================== ROW BY ROW =====================
 
 def import_users(db: Database, filename: str):
-    """Импорт пользователей из CSV файла"""
+    """Импорт пользователей из CSV/XLSX файла"""
     try:
-        with open(filename, 'r', encoding='utf-8') as file:
-            # Читаем CSV с разделителем точка с запятой
-            reader = csv.DictReader(file, delimiter=';')
-            
-            count = 0
-            for row in reader:
-                user_id = db.add_user(
-                    fio=row['fio'],
-                    phone=row['phone'],
-                    login=row['login'],
-                    password=row['password'],
-                    user_type=row['type']
-                )
-                if user_id:
-                    count += 1
-                    print(f"✅ Импортирован пользователь: {row['fio']} ({row['type']})")
-            
-            print(f"\n✅ Всего импортировано пользователей: {count}")
-            
+        count = 0
+        for row in load_valid_rows(db, 'users', filename):
+            user_id = db.add_user(
+                fio=row['fio'],
+                phone=row['phone'],
+                login=row['login'],
+                password=row['password'],
+                user_type=row['type']
+            )
+            if user_id:
+                count += 1
+                print(f"✅ Импортирован пользователь: {row['fio']} ({row['type']})")
+
+        print(f"\n✅ Всего импортировано пользователей: {count}")
+
     except FileNotFoundError:
         print(f"❌ Файл {filename} не найден")
     except Exception as e:
         print(f"❌ Ошибка при импорте пользователей: {e}")
 
 def import_requests(db: Database, filename: str):
-    """Импорт заявок из CSV файла"""
+    """Импорт заявок из CSV/XLSX файла"""
     try:
-        with open(filename, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file, delimiter=';')
-            
-            count = 0
-            for row in reader:
+        count = 0
+        rows = load_valid_rows(db, 'requests', filename)
+        with db.get_cursor() as cur:
+            for row in rows:
                 # Добавляем заявку
-                db.cursor.execute('''
+                cur.execute('''
                     INSERT INTO requests (
                         start_date, climate_tech_type, climate_tech_model,
                         problem_description, request_status, completion_date,
@@ -48,54 +339,708 @@ def import_requests(db: Database, filename: str):
                     row['startDate'],
                     row['climateTechType'],
                     row['climateTechModel'],
-                    row['problem_description'],  # Опечатка в исходных данных
+                    row['problemDescryption'],  # Опечатка в исходных данных
                     row['requestStatus'],
-                    row['completionDate'] if row['completionDate'] != 'null' else None,
+                    None if is_null(row['completionDate']) else row['completionDate'],
                     row['repairParts'] if row['repairParts'] else None,
-                    int(row['masterID']) if row['masterID'] != 'null' else None,
+                    None if is_null(row['masterID']) else int(row['masterID']),
                     int(row['clientID'])
                 ))
-                
-                request_id = db.cursor.fetchone()[0]
-                db.connection.commit()
-                
+
+                request_id = cur.fetchone()[0]
+
                 if request_id:
                     count += 1
                     print(f"✅ Импортирована заявка #{request_id}: {row['climateTechType']} - {row['requestStatus']}")
-            
-            print(f"\n✅ Всего импортировано заявок: {count}")
-            
+
+        print(f"\n✅ Всего импортировано заявок: {count}")
+
     except FileNotFoundError:
         print(f"❌ Файл {filename} не найден")
     except Exception as e:
         print(f"❌ Ошибка при импорте заявок: {e}")
 
 def import_comments(db: Database, filename: str):
-    """Импорт комментариев из CSV файла"""
+    """Импорт комментариев из CSV/XLSX файла"""
     try:
-        with open(filename, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file, delimiter=';')
-            
-            count = 0
-            for row in reader:
-                success = db.add_comment(
-                    message=row['message'],
-                    master_id=int(row['masterID']),
-                    request_id=int(row['requestID'])
+        count = 0
+        for row in load_valid_rows(db, 'comments', filename):
+            success = db.add_comment(
+                message=row['message'],
+                master_id=int(row['masterID']),
+                request_id=int(row['requestID'])
+            )
+            if success:
+                count += 1
+                print(f"✅ Импортирован комментарий к заявке #{row['requestID']}")
+
+        print(f"\n✅ Всего импортировано комментариев: {count}")
+
+    except FileNotFoundError:
+        print(f"❌ Файл {filename} не найден")
+    except Exception as e:
+        print(f"❌ Ошибка при импорте комментариев: {e}")
+
+# ===================== BULK (COPY) =====================
+
+INT_RE = '^[0-9]+$'
+
+
+class RowsAsCsv(io.TextIOBase):
+    """Файлоподобный объект для COPY: отдаёт строки-словари как CSV
+    (с заголовком, разделитель ';') по мере чтения, не накапливая их"""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, delimiter=';', lineterminator='\n')
+        self._pending = ''
+        self._columns = None
+
+    def readable(self):
+        return True
+
+    def _next_line(self) -> str:
+        row = next(self._rows, None)
+        if row is None:
+            return ''
+        if self._columns is None:
+            # Первая строка: сначала заголовок, сама строка — следом
+            self._columns = list(row)
+            self._writer.writerow(self._columns)
+        self._writer.writerow([row.get(column, '') for column in self._columns])
+        line = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return line
+
+    def readline(self, size=-1):
+        if '\n' not in self._pending:
+            self._pending += self._next_line()
+        head, sep, tail = self._pending.partition('\n')
+        self._pending = tail
+        return head + sep
+
+    def read(self, size=-1):
+        while size is None or size < 0 or len(self._pending) < size:
+            line = self._next_line()
+            if not line:
+                break
+            self._pending += line
+        if size is None or size < 0:
+            size = len(self._pending)
+        chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+
+def copy_csv_to_staging(cur, file, staging: str) -> int:
+    """Заливает CSV (с заголовком, разделитель ';') во временную таблицу через COPY.
+
+    Колонки staging-таблицы называются как в заголовке файла и имеют тип
+    TEXT; таблица удаляется по завершении транзакции. Возвращает число
+    загруженных строк.
+    """
+    header = next(csv.reader([file.readline()], delimiter=';'), [])
+    columns = [name.strip().lstrip('\ufeff') for name in header]
+    if not columns:
+        raise ValueError("файл пуст: нет строки заголовка")
+
+    cur.execute(sql.SQL("CREATE TEMP TABLE {} ({}) ON COMMIT DROP").format(
+        sql.Identifier(staging),
+        sql.SQL(', ').join(
+            sql.SQL('{} TEXT').format(sql.Identifier(column)) for column in columns
+        )
+    ))
+    cur.copy_expert(
+        sql.SQL("COPY {} FROM STDIN WITH (FORMAT csv, DELIMITER ';')").format(
+            sql.Identifier(staging)
+        ).as_string(cur),
+        file
+    )
+    cur.execute(sql.SQL("SELECT COUNT(*) FROM {}").format(sql.Identifier(staging)))
+    return cur.fetchone()[0]
+
+
+def print_bulk_report(title: str, staged: int, loaded: int, started: float, rejected: int = 0):
+    """Итог загрузки файла: строки, отклонённые строки и скорость.
+
+    staged — строки, дошедшие до загрузки; rejected — строки, отклонённые
+    ещё при проверке файла (RejectReport.count).
+    """
+    elapsed = time.perf_counter() - started
+    total = staged + rejected
+    rate = total / elapsed if elapsed > 0 else 0
+    print(
+        f"✅ {title}: загружено {loaded} из {total} строк "
+        f"(отклонено {total - loaded}) за {elapsed:.2f} с — {rate:.0f} строк/с"
+    )
+
+
+def bulk_import_users(db: Database, filename: str, workers: int | None = None) -> dict:
+    """Пакетный импорт пользователей.
+
+    Пароли новых логинов хешируются параллельно в пуле из workers
+    процессов (None — по числу ядер), затем готовые строки заливаются
+    COPY в staging и вставляются INSERT ... ON CONFLICT (login) DO NOTHING
+    одной транзакцией. Как и add_user, для уже существующего логина
+    используется его user_id. Соответствие userID файла и user_id
+    записывается в import_id_map — по нему заявки и комментарии
+    находят своих клиентов и мастеров.
+
+    Returns:
+        {login: user_id} для всех логинов файла
+    """
+    try:
+        started = time.perf_counter()
+        # Нужен весь список: по нему возвращаются user_id всех логинов файла
+        with RejectReport(filename) as report:
+            rows = list(load_valid_rows(db, 'users', filename, report))
+
+        # Существующие логины не хешируем — они всё равно не будут вставлены
+        with db.get_cursor() as cur:
+            cur.execute(
+                "SELECT login FROM users WHERE login = ANY(%s)",
+                ([row['login'] for row in rows],)
+            )
+            existing = {r[0] for r in cur.fetchall()}
+        new_rows = [row for row in rows if row['login'] not in existing]
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            hashes = list(executor.map(
+                hash_password,
+                [row['password'] for row in new_rows],
+                chunksize=64
+            ))
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=';')
+        writer.writerow(['fio', 'phone', 'login', 'password', 'type'])
+        for row, hashed_password in zip(new_rows, hashes):
+            writer.writerow([row['fio'], row['phone'], row['login'], hashed_password, row['type']])
+        buffer.seek(0)
+
+        with db.transaction() as conn:
+            with conn.cursor() as cur:
+                copy_csv_to_staging(cur, buffer, 'staging_users')
+                cur.execute("""
+                    INSERT INTO users (fio, phone, login, password, user_type)
+                    SELECT s.fio, s.phone, s.login, s.password, s.type
+                    FROM staging_users s
+                    ORDER BY s.login
+                    ON CONFLICT (login) DO NOTHING
+                """)
+                loaded = cur.rowcount
+
+                cur.execute(
+                    "SELECT login, user_id FROM users WHERE login = ANY(%s)",
+                    ([row['login'] for row in rows],)
                 )
-                if success:
-                    count += 1
-                    print(f"✅ Импортирован комментарий к заявке #{row['requestID']}")
-            
-            print(f"\n✅ Всего импортировано комментариев: {count}")
-            
+                user_ids = dict(cur.fetchall())
+                save_id_map(cur, 'user', [(row['userID'], user_ids[row['login']]) for row in rows])
+
+        print_bulk_report('Пользователи', len(rows), loaded, started, report.count)
+        return user_ids
+
+    except FileNotFoundError:
+        print(f"❌ Файл {filename} не найден")
+    except Exception as e:
+        print(f"❌ Ошибка при импорте пользователей: {e}")
+    return {}
+
+
+def count_loaded(cur, staging: str, entity: str, id_column: str) -> int:
+    """Сколько строк staging уже загружено прошлыми запусками (есть в import_id_map)"""
+    cur.execute(sql.SQL("""
+        SELECT count(*) FROM {} s
+        JOIN import_id_map m ON m.entity = %s AND m.source_id = s.{}
+    """).format(sql.Identifier(staging), sql.Identifier(id_column)), (entity,))
+    return cur.fetchone()[0]
+
+
+def bulk_import_requests(db: Database, filename: str):
+    """Пакетный импорт заявок: COPY в staging и INSERT ... SELECT одной
+    транзакцией.
+
+    Клиент и мастер находятся по их userID через import_id_map, новые
+    request_id записываются туда же. Заявки, чей requestID уже есть в
+    import_id_map, пропускаются — повторный запуск ничего не задваивает.
+    """
+    try:
+        started = time.perf_counter()
+        with RejectReport(filename) as report:
+            rows = load_valid_rows(db, 'requests', filename, report, references='import_id_map')
+            first = next(rows, None)
+            if first is None:
+                print_bulk_report('Заявки', 0, 0, started, report.count)
+                return
+            # Строки проверяются пакетами по мере того, как COPY их читает
+            with RowsAsCsv(chain([first], rows)) as file:
+                with db.transaction() as conn:
+                    with conn.cursor() as cur:
+                        staged = copy_csv_to_staging(cur, file, 'staging_requests')
+                        skipped = count_loaded(cur, 'staging_requests', 'request', 'requestID')
+                        # request_id выдаётся заранее, чтобы записать его
+                        # в import_id_map тем же запросом
+                        cur.execute("""
+                            WITH new_rows AS (
+                                SELECT o.*,
+                                       nextval(pg_get_serial_sequence('requests', 'request_id')) AS new_id
+                                FROM (
+                                    SELECT s.* FROM staging_requests s
+                                    WHERE NOT EXISTS (
+                                        SELECT 1 FROM import_id_map m
+                                        WHERE m.entity = 'request' AND m.source_id = s."requestID"
+                                    )
+                                    ORDER BY CASE WHEN s."requestID" ~ %s
+                                                  THEN s."requestID"::int END
+                                ) o
+                            ),
+                            inserted AS (
+                                INSERT INTO requests (
+                                    request_id, start_date, climate_tech_type, climate_tech_model,
+                                    problem_description, request_status, completion_date,
+                                    repair_parts, master_id, client_id
+                                )
+                                SELECT n.new_id,
+                                       n."startDate"::date,
+                                       n."climateTechType",
+                                       n."climateTechModel",
+                                       n."problemDescryption",
+                                       n."requestStatus",
+                                       NULLIF(NULLIF(n."completionDate", 'null'), '')::date,
+                                       NULLIF(n."repairParts", ''),
+                                       master.db_id,
+                                       client.db_id
+                                FROM new_rows n
+                                JOIN import_id_map client
+                                  ON client.entity = 'user' AND client.source_id = n."clientID"
+                                LEFT JOIN import_id_map master
+                                  ON master.entity = 'user' AND master.source_id = n."masterID"
+                                RETURNING request_id
+                            )
+                            INSERT INTO import_id_map (entity, source_id, db_id)
+                            SELECT 'request', n."requestID", n.new_id
+                            FROM new_rows n
+                            JOIN inserted i ON i.request_id = n.new_id
+                            ON CONFLICT (entity, source_id) DO NOTHING
+                        """, (INT_RE,))
+                        loaded = cur.rowcount
+
+        print_bulk_report('Заявки', staged, loaded, started, report.count)
+        if skipped:
+            print(f"   пропущено ранее загруженных строк: {skipped}")
+
+    except FileNotFoundError:
+        print(f"❌ Файл {filename} не найден")
+    except Exception as e:
+        print(f"❌ Ошибка при импорте заявок: {e}")
+
+
+def bulk_import_comments(db: Database, filename: str):
+    """Пакетный импорт комментариев: COPY в staging и INSERT ... SELECT
+    одной транзакцией. Мастер и заявка находятся через import_id_map,
+    уже загруженные commentID пропускаются, как в bulk_import_requests.
+    """
+    try:
+        started = time.perf_counter()
+        with RejectReport(filename) as report:
+            rows = load_valid_rows(db, 'comments', filename, report, references='import_id_map')
+            first = next(rows, None)
+            if first is None:
+                print_bulk_report('Комментарии', 0, 0, started, report.count)
+                return
+            with RowsAsCsv(chain([first], rows)) as file:
+                with db.transaction() as conn:
+                    with conn.cursor() as cur:
+                        staged = copy_csv_to_staging(cur, file, 'staging_comments')
+                        skipped = count_loaded(cur, 'staging_comments', 'comment', 'commentID')
+                        cur.execute("""
+                            WITH new_rows AS (
+                                SELECT s.*,
+                                       nextval(pg_get_serial_sequence('comments', 'comment_id')) AS new_id
+                                FROM staging_comments s
+                                WHERE NOT EXISTS (
+                                    SELECT 1 FROM import_id_map m
+                                    WHERE m.entity = 'comment' AND m.source_id = s."commentID"
+                                )
+                            ),
+                            inserted AS (
+                                INSERT INTO comments (comment_id, message, master_id, request_id)
+                                SELECT n.new_id, n.message, master.db_id, request.db_id
+                                FROM new_rows n
+                                JOIN import_id_map master
+                                  ON master.entity = 'user' AND master.source_id = n."masterID"
+                                JOIN import_id_map request
+                                  ON request.entity = 'request' AND request.source_id = n."requestID"
+                                RETURNING comment_id
+                            )
+                            INSERT INTO import_id_map (entity, source_id, db_id)
+                            SELECT 'comment', n."commentID", n.new_id
+                            FROM new_rows n
+                            JOIN inserted i ON i.comment_id = n.new_id
+                            ON CONFLICT (entity, source_id) DO NOTHING
+                        """)
+                        loaded = cur.rowcount
+
+        print_bulk_report('Комментарии', staged, loaded, started, report.count)
+        if skipped:
+            print(f"   пропущено ранее загруженных строк: {skipped}")
+
+    except FileNotFoundError:
+        print(f"❌ Файл {filename} не найден")
+    except Exception as e:
+        print(f"❌ Ошибка при импорте комментариев: {e}")
+
+
+# ===================== RESUMABLE =====================
+
+def ensure_import_tables(db: Database):
+    """Создаёт служебные таблицы импорта, если схема создавалась без них.
+    Контрольная точка lines_done — число строк данных исходного файла."""
+    with db.get_cursor() as cur:
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS import_id_map (
+                entity VARCHAR(20) NOT NULL,
+                source_id VARCHAR(50) NOT NULL,
+                db_id INTEGER NOT NULL,
+                PRIMARY KEY (entity, source_id)
+            );
+            CREATE TABLE IF NOT EXISTS import_checkpoints (
+                source_file TEXT PRIMARY KEY,
+                lines_done INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+
+
+def load_id_map(db: Database, entity: str) -> dict:
+    """{ID из исходного файла: ID в БД} для сущности ('user', 'request', 'comment')"""
+    with db.get_cursor() as cur:
+        cur.execute(
+            "SELECT source_id, db_id FROM import_id_map WHERE entity = %s",
+            (entity,)
+        )
+        return dict(cur.fetchall())
+
+
+def load_checkpoint(db: Database, filename: str) -> int:
+    """Сколько строк данных файла (с начала, без заголовка) уже
+    обработано в прошлых запусках"""
+    with db.get_cursor() as cur:
+        cur.execute(
+            "SELECT lines_done FROM import_checkpoints WHERE source_file = %s",
+            (os.path.abspath(filename),)
+        )
+        row = cur.fetchone()
+        return row[0] if row else 0
+
+
+def save_id_map(cur, entity: str, pairs: list):
+    """Записывает соответствия (ID из файла, ID в БД); уже известные не меняются"""
+    if pairs:
+        extras.execute_values(cur, """
+            INSERT INTO import_id_map (entity, source_id, db_id)
+            VALUES %s
+            ON CONFLICT (entity, source_id) DO NOTHING
+        """, [(entity, source_id, db_id) for source_id, db_id in pairs])
+
+
+def save_progress(cur, entity: str, pairs: list, filename: str, lines_done: int):
+    """Сохраняет новые соответствия ID и контрольную точку (в транзакции пакета)"""
+    save_id_map(cur, entity, pairs)
+    cur.execute("""
+        INSERT INTO import_checkpoints (source_file, lines_done)
+        VALUES (%s, %s)
+        ON CONFLICT (source_file) DO UPDATE
+        SET lines_done = EXCLUDED.lines_done,
+            updated_at = CURRENT_TIMESTAMP
+    """, (os.path.abspath(filename), lines_done))
+
+
+class Checkpoint:
+    """Контрольная точка --resumable: сколько строк файла подряд с начала
+    обработано полностью — загружено сейчас или в прошлых запусках.
+
+    На первой отклонённой строке точка останавливается до конца запуска:
+    следующий запуск начнёт с этой строки, и после исправления файла
+    (или загрузки недостающих пользователей/заявок) она будет загружена.
+    Строки за ней, уже загруженные, пропустятся по import_id_map.
+    """
+
+    def __init__(self, lines_done: int):
+        self.lines_done = lines_done
+        self._stopped = False
+
+    def mark(self, number: int, done: bool):
+        """Итог строки number; строки отмечаются в порядке файла"""
+        if not done:
+            self._stopped = True
+        elif not self._stopped:
+            self.lines_done = number
+
+
+def split_batch(batch: list, report: RejectReport, checkpoint: Checkpoint,
+                loaded: dict, id_column: str, references: list = ()) -> tuple:
+    """Разбирает проверенный пакет check_batches перед загрузкой.
+
+    Строки, чей id_column уже есть в loaded, пропускаются; строки с
+    ошибками и со ссылками, которых нет в import_id_map, пишутся в report;
+    каждая строка отмечается в checkpoint.
+    references: [(колонка, соответствия ID, допускается ли пустое значение)]
+    Returns: (строки для загрузки, число пропущенных строк)
+    """
+    pending = []
+    skipped = 0
+    for number, row, reasons in batch:
+        if not reasons and row[id_column] in loaded:
+            skipped += 1
+            checkpoint.mark(number, True)
+            continue
+        for column, id_map, nullable in references:
+            value = row[column]
+            if not (nullable and is_null(value)) and value not in id_map:
+                reasons.append(f"{column}: нет в import_id_map ({value!r})")
+        if reasons:
+            report.add(number, row, reasons)
+        else:
+            pending.append(row)
+        checkpoint.mark(number, not reasons)
+    return pending, skipped
+
+
+def allocate_ids(cur, table: str, column: str, count: int) -> list:
+    """Заранее берёт count значений из последовательности SERIAL-колонки,
+    чтобы соответствие исходных и новых ID не зависело от порядка RETURNING"""
+    if not count:
+        return []
+    cur.execute(
+        "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+        (table, column, count)
+    )
+    return [r[0] for r in cur.fetchall()]
+
+
+def resumable_import_users(db: Database, filename: str, batch_size: int = 1000,
+                           workers: int | None = None):
+    """Идемпотентный импорт пользователей по userID.
+
+    Каждый пакет загружается в своей транзакции вместе с соответствиями
+    userID -> user_id и контрольной точкой; повторный запуск продолжает
+    с места остановки и пропускает уже загруженные userID. Для
+    существующего логина используется его user_id, как в add_user.
+    """
+    try:
+        started = time.perf_counter()
+        user_map = load_id_map(db, 'user')
+        start = load_checkpoint(db, filename)
+        checkpoint = Checkpoint(start)
+        loaded = skipped = 0
+
+        with RejectReport(filename) as report, ProcessPoolExecutor(max_workers=workers) as executor:
+            for batch in check_batches(db, 'users', filename, start, batch_size, references=None):
+                pending, batch_skipped = split_batch(batch, report, checkpoint, user_map, 'userID')
+                skipped += batch_skipped
+                hashes = list(executor.map(
+                    hash_password, [row['password'] for row in pending], chunksize=64
+                ))
+
+                with db.transaction() as conn:
+                    with conn.cursor() as cur:
+                        if pending:
+                            extras.execute_values(cur, """
+                                INSERT INTO users (fio, phone, login, password, user_type)
+                                VALUES %s
+                                ON CONFLICT (login) DO NOTHING
+                            """, [
+                                (row['fio'], row['phone'], row['login'], hashed_password, row['type'])
+                                for row, hashed_password in zip(pending, hashes)
+                            ])
+                            cur.execute(
+                                "SELECT login, user_id FROM users WHERE login = ANY(%s)",
+                                ([row['login'] for row in pending],)
+                            )
+                            by_login = dict(cur.fetchall())
+                        else:
+                            by_login = {}
+
+                        pairs = [(row['userID'], by_login[row['login']]) for row in pending]
+                        save_progress(cur, 'user', pairs, filename, checkpoint.lines_done)
+
+                user_map.update(pairs)
+                loaded += len(pairs)
+
+        print_bulk_report('Пользователи', loaded + skipped, loaded, started, report.count)
+        if start or skipped:
+            print(f"   пропущено ранее загруженных строк: {start + skipped}")
+
+    except FileNotFoundError:
+        print(f"❌ Файл {filename} не найден")
+    except Exception as e:
+        print(f"❌ Ошибка при импорте пользователей: {e}")
+
+
+def resumable_import_requests(db: Database, filename: str, batch_size: int = 1000):
+    """Идемпотентный импорт заявок по requestID.
+
+    masterID/clientID переводятся в user_id через соответствия из
+    import_id_map (словарь в памяти); строки с неизвестным клиентом
+    или мастером отклоняются в отчёт. Пакеты и контрольные точки — как в resumable_import_users.
+    """
+    try:
+        started = time.perf_counter()
+        user_map = load_id_map(db, 'user')
+        request_map = load_id_map(db, 'request')
+        start = load_checkpoint(db, filename)
+        checkpoint = Checkpoint(start)
+        loaded = skipped = 0
+
+        with RejectReport(filename) as report:
+            for batch in check_batches(db, 'requests', filename, start, batch_size, references=None):
+                pending, batch_skipped = split_batch(
+                    batch, report, checkpoint, request_map, 'requestID',
+                    [('clientID', user_map, False), ('masterID', user_map, True)]
+                )
+                skipped += batch_skipped
+
+                with db.transaction() as conn:
+                    with conn.cursor() as cur:
+                        new_ids = allocate_ids(cur, 'requests', 'request_id', len(pending))
+                        if pending:
+                            extras.execute_values(cur, """
+                                INSERT INTO requests (
+                                    request_id, start_date, climate_tech_type, climate_tech_model,
+                                    problem_description, request_status, completion_date,
+                                    repair_parts, master_id, client_id
+                                ) VALUES %s
+                            """, [
+                                (
+                                    request_id,
+                                    row['startDate'],
+                                    row['climateTechType'],
+                                    row['climateTechModel'],
+                                    row['problemDescryption'],
+                                    row['requestStatus'],
+                                    None if is_null(row['completionDate']) else row['completionDate'],
+                                    row['repairParts'] or None,
+                                    None if is_null(row['masterID']) else user_map[row['masterID']],
+                                    user_map[row['clientID']]
+                                )
+                                for request_id, row in zip(new_ids, pending)
+                            ])
+                        pairs = [(row['requestID'], request_id) for request_id, row in zip(new_ids, pending)]
+                        save_progress(cur, 'request', pairs, filename, checkpoint.lines_done)
+
+                request_map.update(pairs)
+                loaded += len(pairs)
+
+        print_bulk_report('Заявки', loaded + skipped, loaded, started, report.count)
+        if start or skipped:
+            print(f"   пропущено ранее загруженных строк: {start + skipped}")
+
+    except FileNotFoundError:
+        print(f"❌ Файл {filename} не найден")
+    except Exception as e:
+        print(f"❌ Ошибка при импорте заявок: {e}")
+
+
+def resumable_import_comments(db: Database, filename: str, batch_size: int = 1000):
+    """Идемпотентный импорт комментариев по commentID; masterID и
+    requestID переводятся через import_id_map"""
+    try:
+        started = time.perf_counter()
+        user_map = load_id_map(db, 'user')
+        request_map = load_id_map(db, 'request')
+        comment_map = load_id_map(db, 'comment')
+        start = load_checkpoint(db, filename)
+        checkpoint = Checkpoint(start)
+        loaded = skipped = 0
+
+        with RejectReport(filename) as report:
+            for batch in check_batches(db, 'comments', filename, start, batch_size, references=None):
+                pending, batch_skipped = split_batch(
+                    batch, report, checkpoint, comment_map, 'commentID',
+                    [('masterID', user_map, False), ('requestID', request_map, False)]
+                )
+                skipped += batch_skipped
+
+                with db.transaction() as conn:
+                    with conn.cursor() as cur:
+                        new_ids = allocate_ids(cur, 'comments', 'comment_id', len(pending))
+                        if pending:
+                            extras.execute_values(cur, """
+                                INSERT INTO comments (comment_id, message, master_id, request_id)
+                                VALUES %s
+                            """, [
+                                (
+                                    comment_id,
+                                    row['message'],
+                                    user_map[row['masterID']],
+                                    request_map[row['requestID']]
+                                )
+                                for comment_id, row in zip(new_ids, pending)
+                            ])
+                        pairs = [(row['commentID'], comment_id) for comment_id, row in zip(new_ids, pending)]
+                        save_progress(cur, 'comment', pairs, filename, checkpoint.lines_done)
+
+                comment_map.update(pairs)
+                loaded += len(pairs)
+
+        print_bulk_report('Комментарии', loaded + skipped, loaded, started, report.count)
+        if start or skipped:
+            print(f"   пропущено ранее загруженных строк: {start + skipped}")
+
     except FileNotFoundError:
         print(f"❌ Файл {filename} не найден")
     except Exception as e:
         print(f"❌ Ошибка при импорте комментариев: {e}")
 
+
 def main():
     """Главная функция для импорта всех данных"""
+    parser = argparse.ArgumentParser(description='Импорт данных в базу')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        '--bulk', action='store_true',
+        help='пакетный режим: COPY в staging-таблицы, одна транзакция на файл; '
+             'уже загруженные исходные ID пропускаются по import_id_map'
+    )
+    mode.add_argument(
+        '--resumable', action='store_true',
+        help='идемпотентный режим: соответствия исходных ID в import_id_map, '
+             'продолжение с контрольной точки после сбоя'
+    )
+    parser.add_argument(
+        '--batch-size', type=int, default=1000,
+        help='размер пакета (транзакции) в режиме --resumable'
+    )
+    parser.add_argument(
+        '--workers', type=int, default=None,
+        help='число процессов для хеширования паролей в пакетном режиме '
+             '(по умолчанию — по числу ядер)'
+    )
+    parser.add_argument(
+        '--format', choices=['csv', 'xlsx'], default='csv',
+        help='формат файлов inputData* (xlsx читается потоково, без конвертации)'
+    )
+    args = parser.parse_args()
+
+    if args.bulk:
+        users_import, requests_import, comments_import = (
+            lambda db, filename: bulk_import_users(db, filename, args.workers),
+            bulk_import_requests,
+            bulk_import_comments
+        )
+    elif args.resumable:
+        users_import, requests_import, comments_import = (
+            lambda db, filename: resumable_import_users(db, filename, args.batch_size, args.workers),
+            lambda db, filename: resumable_import_requests(db, filename, args.batch_size),
+            lambda db, filename: resumable_import_comments(db, filename, args.batch_size)
+        )
+    else:
+        users_import, requests_import, comments_import = (
+            import_users, import_requests, import_comments
+        )
+
     print("="*60)
     print("🔄 ИМПОРТ ДАННЫХ В БАЗУ")
     print("="*60)
@@ -111,17 +1056,20 @@ def main():
     )
     
     try:
+        if args.bulk or args.resumable:
+            ensure_import_tables(db)
+
         # Импорт пользователей
         print("\n📥 Импорт пользователей...")
-        import_users(db, 'inputDataUsers.csv')
+        users_import(db, f'inputDataUsers.{args.format}')
         
         # Импорт заявок
         print("\n📥 Импорт заявок...")
-        import_requests(db, 'inputDataRequests.csv')
+        requests_import(db, f'inputDataRequests.{args.format}')
         
         # Импорт комментариев
         print("\n📥 Импорт комментариев...")
-        import_comments(db, 'inputDataComments.csv')
+        comments_import(db, f'inputDataComments.{args.format}')
         
         print("\n" + "="*60)
         print("✅ ИМПОРТ УСПЕШНО ЗАВЕРШЁН!")
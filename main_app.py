@@ -1,22 +1,42 @@
+import os
 import sys
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QLineEdit, QPushButton, QTableWidget, QTableWidgetItem,
+    QLabel, QLineEdit, QPushButton, QTableView,
     QComboBox, QTextEdit, QMessageBox, QDialog, QFormLayout,
-    QTabWidget, QHeaderView, QGroupBox, QDateEdit, QStackedWidget
+    QTabWidget, QHeaderView, QGroupBox, QDateEdit, QStackedWidget,
+    QCheckBox, QListView
 )
-from PyQt6.QtCore import Qt, QDate
+from PyQt6.QtCore import Qt, QDate, QTimer
 from PyQt6.QtGui import QFont, QIcon
-from database_module import Database
+from database_module import Database, QueryHandle, NO_MASTER
+from psycopg2.extensions import QueryCanceledError
+from async_db import AsyncDatabase
 from qr_generator import QRCodeDialog
+from user_models import UserTableModel, RoleDelegate, ROLE_CHOICES, ROLE_COLUMN, USERS_PAGE_SIZE
+from request_models import (
+    RequestStore, RequestTableModel, RequestFilterProxyModel, CommentListModel,
+    PAGE_SIZE, COMMENTS_PAGE_SIZE,
+    by_status, by_client, by_master, unassigned, by_due_date,
+    matches_filter, filter_covers
+)
+
+# Живой поиск: пауза после ввода перед запросом и лимит времени запроса
+SEARCH_DEBOUNCE_MS = 300
+SEARCH_TIMEOUT_MS = 2000
+
+# Период автообновления заявок (только изменённые строки)
+AUTO_REFRESH_MS = 30000
 
 
 class LoginWindow(QDialog):
     """Окно авторизации"""
 
-    def __init__(self):
+    def __init__(self, db=None):
         super().__init__()
-        self.db = Database()
+        # При выходе из аккаунта переиспользуем уже открытое подключение/пул.
+        # Пул нужен, чтобы фоновые загрузки вкладок шли параллельно
+        self.db = db or Database(pool_max=int(os.getenv('DB_POOL_MAX', '4')))
         self.current_user = None
         self.create_admin_user()
         self.init_ui()
@@ -314,6 +334,10 @@ class MainWindow(QMainWindow):
         self.db = db
         self.current_user = user
         self.is_admin = user.get('login') == 'admin'
+        # Все запросы окна выполняются в фоне, GUI не блокируется
+        self.async_db = AsyncDatabase(db, self)
+        # Заявки всех вкладок — проекции одного хранилища
+        self.request_store = RequestStore(self)
         self.init_ui()
 
     def init_ui(self):
@@ -395,27 +419,162 @@ class MainWindow(QMainWindow):
             }
         """)
 
-        self.create_requests_tab()
-        self.create_my_requests_tab()
-        
+        # Вкладки создаются и загружаются при первом показе;
+        # данные вкладки не перезапрашиваются, пока не устарели
+        self.lazy_tabs = {}
+
+        self.add_lazy_tab('requests', 'Все заявки', self.create_requests_tab, self.load_requests)
+
+        if self.current_user['user_type'] == 'Заказчик':
+            self.add_lazy_tab('my', 'Мои заявки', self.create_my_requests_tab, self.load_my_requests)
+        elif self.current_user['user_type'] == 'Специалист':
+            self.add_lazy_tab('my', 'Мои задачи', self.create_my_requests_tab, self.load_my_requests)
+
         if self.current_user['user_type'] == 'Специалист':
-            self.create_available_requests_tab()
+            self.add_lazy_tab(
+                'available', 'Доступные заявки',
+                self.create_available_requests_tab, self.load_available_requests
+            )
 
         if self.is_admin or self.current_user['user_type'] in ['Менеджер по качеству']:
-            self.create_qr_code_tab()
+            self.add_lazy_tab('qr', 'QR-код', self.create_qr_code_tab)
 
         if self.is_admin or self.current_user['user_type'] in ['Менеджер', 'Оператор', 'Менеджер по качеству']:
-            self.create_statistics_tab()
+            self.add_lazy_tab('statistics', 'Статистика', self.create_statistics_tab, self.load_statistics)
 
         if self.is_admin:
-            self.create_users_tab()
+            self.add_lazy_tab('users', 'Пользователи', self.create_users_tab, self.load_users)
 
         layout.addWidget(self.tabs)
 
         main_widget.setLayout(layout)
 
-        if self.current_user['user_type'] in ['Заказчик', 'Специалист'] or self.is_admin:
-            self.load_my_requests()
+        # Индикатор фоновой загрузки
+        self.loading_label = QLabel('')
+        self.statusBar().addPermanentWidget(self.loading_label)
+        self.async_db.busy_changed.connect(self.set_loading)
+
+        # Обновление: кнопки "Обновить" и таймер подтягивают только
+        # изменённые заявки (get_requests_changed_since)
+        self.sync_watermark = None
+        self.auto_refresh_timer = QTimer(self)
+        self.auto_refresh_timer.setInterval(AUTO_REFRESH_MS)
+        self.auto_refresh_timer.timeout.connect(self.sync_requests)
+        auto_refresh_check = QCheckBox('Автообновление')
+        auto_refresh_check.toggled.connect(self.toggle_auto_refresh)
+        self.statusBar().addPermanentWidget(auto_refresh_check)
+        # Вкладки загружаются только после получения метки (start_tabs):
+        # снимок первой страницы берётся не раньше метки, и изменение,
+        # закоммиченное между ними, придёт при следующем обновлении
+        self.tabs_started = False
+        self.sync_requests()
+
+    def add_lazy_tab(self, key, title, build, load=None):
+        """Добавляет пустую вкладку; build(tab) наполняет её при первом показе,
+        load() загружает данные"""
+        tab = QWidget()
+        self.lazy_tabs[key] = {
+            'widget': tab, 'build': build, 'load': load,
+            'built': False, 'stale': True
+        }
+        self.tabs.addTab(tab, title)
+
+    def start_tabs(self):
+        """Первая загрузка: строится и загружается только видимая вкладка"""
+        if self.tabs_started:
+            return
+        self.tabs_started = True
+        self.tabs.currentChanged.connect(self.show_tab)
+        self.show_tab(self.tabs.currentIndex())
+
+    def show_tab(self, index):
+        """Создание и загрузка вкладки при её показе"""
+        widget = self.tabs.widget(index)
+        for entry in self.lazy_tabs.values():
+            if entry['widget'] is widget:
+                break
+        else:
+            return
+
+        if not entry['built']:
+            entry['build'](widget)
+            entry['built'] = True
+        if entry['stale']:
+            entry['stale'] = False
+            if entry['load'] is not None:
+                entry['load']()
+
+    def invalidate_tabs(self, *keys):
+        """Помечает данные вкладок устаревшими; текущая вкладка
+        перезагружается сразу, остальные — при следующем показе"""
+        for key in keys:
+            if key in self.lazy_tabs:
+                self.lazy_tabs[key]['stale'] = True
+        self.show_tab(self.tabs.currentIndex())
+
+    def requests_changed(self, request_ids):
+        """Заявки изменились: перечитываем только их (один запрос),
+        таблицы всех вкладок обновляются из общего хранилища"""
+        request_ids = [request_id for request_id in request_ids if request_id]
+        if request_ids:
+            self.async_db.call(
+                None, 'get_requests_by_ids', request_ids,
+                on_result=self.request_store.update, on_error=self.show_db_error
+            )
+        self.invalidate_tabs('statistics')
+
+    def sync_requests(self):
+        """Подтягивает заявки, изменённые после прошлого обновления"""
+        self.async_db.call(
+            'sync', 'get_requests_changed_since', self.sync_watermark,
+            on_result=self.merge_changed_requests, on_error=self.on_sync_error
+        )
+
+    def merge_changed_requests(self, result):
+        """Изменённые заявки — в общее хранилище; таблицы обновляются сами"""
+        changed, self.sync_watermark = result
+        self.start_tabs()
+        if changed:
+            self.request_store.update(changed)
+            self.invalidate_tabs('statistics')
+            self.statusBar().showMessage(f'Обновлено заявок: {len(changed)}', 5000)
+
+    def on_sync_error(self, error):
+        # Без модального окна: обновление может идти по таймеру
+        print(f"sync_requests error: {error}")
+        self.statusBar().showMessage('Не удалось обновить заявки', 5000)
+        # Без метки вкладки всё равно нужны; она будет получена при следующем обновлении
+        self.start_tabs()
+
+    def toggle_auto_refresh(self, enabled):
+        if enabled:
+            self.auto_refresh_timer.start()
+        else:
+            self.auto_refresh_timer.stop()
+
+    def closeEvent(self, event):
+        """Закрытое окно (в т.ч. после выхода из аккаунта) остаётся в памяти
+        у следующего окна, поэтому опрос БД по таймеру нужно остановить"""
+        self.auto_refresh_timer.stop()
+        self.async_db.cancel('sync')
+        super().closeEvent(event)
+
+    def refresh_requests(self):
+        """Кнопка "Обновить" вкладки заявок"""
+        if self.requests_source_filter is None:
+            # Показаны результаты поиска — возвращаем список
+            self.search_input.clear()
+            self.load_requests()
+        else:
+            self.sync_requests()
+
+    def set_loading(self, busy):
+        """Показ индикатора загрузки в строке состояния"""
+        self.loading_label.setText('Загрузка...' if busy else '')
+
+    def show_db_error(self, error):
+        """Ошибка фонового запроса"""
+        QMessageBox.critical(self, 'Ошибка', f'Ошибка при обращении к базе данных: {error}')
 
     def logout(self):
         """Выход из аккаунта"""
@@ -430,15 +589,14 @@ class MainWindow(QMainWindow):
         if reply == QMessageBox.StandardButton.Yes:
             self.close()
             # Открываем окно авторизации заново
-            login_window = LoginWindow()
+            login_window = LoginWindow(self.db)
             if login_window.exec() == QDialog.DialogCode.Accepted:
                 user = login_window.current_user
                 self.new_window = MainWindow(login_window.db, user)
                 self.new_window.show()
 
-    def create_users_tab(self):
+    def create_users_tab(self, tab):
         """Вкладка управления пользователями (только для админа)"""
-        tab = QWidget()
         layout = QVBoxLayout()
 
         # Заголовок
@@ -446,18 +604,40 @@ class MainWindow(QMainWindow):
         title.setStyleSheet("font-size: 18px; font-weight: bold; padding: 10px; color: #2C3E50;")
         layout.addWidget(title)
 
+        control_panel = QHBoxLayout()
+
+        # Фильтр по роли (на сервере, по индексу idx_users_type_id)
+        self.user_type_filter = QComboBox()
+        self.user_type_filter.addItem('Все роли', None)
+        for user_type in ROLE_CHOICES:
+            self.user_type_filter.addItem(user_type, user_type)
+        self.user_type_filter.currentIndexChanged.connect(self.load_users)
+        control_panel.addWidget(QLabel('Роль:'))
+        control_panel.addWidget(self.user_type_filter)
+        control_panel.addStretch()
+
         # Кнопка обновления
         refresh_btn = QPushButton('Обновить список')
         refresh_btn.clicked.connect(self.load_users)
-        layout.addWidget(refresh_btn)
+        control_panel.addWidget(refresh_btn)
+
+        layout.addLayout(control_panel)
 
-        # Таблица пользователей
-        self.users_table = QTableWidget()
-        self.users_table.setColumnCount(6)
-        self.users_table.setHorizontalHeaderLabels(['ID', 'ФИО', 'Телефон', 'Логин', 'Роль', 'Действие'])
+        # Таблица пользователей: строки подгружаются по прокрутке,
+        # выпадающий список роли создаётся только для редактируемой ячейки
+        self.users_model = UserTableModel(
+            self, async_db=self.async_db, locked_ids=[self.current_user['user_id']]
+        )
+        self.users_model.role_change_requested.connect(self.change_user_role)
+        self.users_table = QTableView()
+        self.users_table.setModel(self.users_model)
+        self.users_table.setItemDelegateForColumn(ROLE_COLUMN, RoleDelegate(self.users_table))
         self.users_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.users_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.users_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.users_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.users_table.setSelectionMode(QTableView.SelectionMode.SingleSelection)
+        self.users_table.setEditTriggers(
+            QTableView.EditTrigger.DoubleClicked | QTableView.EditTrigger.SelectedClicked
+        )
 
         layout.addWidget(self.users_table)
 
@@ -479,64 +659,39 @@ class MainWindow(QMainWindow):
         layout.addWidget(delete_btn)
 
         tab.setLayout(layout)
-        self.tabs.addTab(tab, 'Пользователи')
-
-        # Загрузка пользователей
-        self.load_users()
 
     def load_users(self):
-        """Загрузка списка пользователей"""
-        users = self.db.get_all_users()
-
-        self.users_table.setRowCount(len(users))
-
-        for row, user in enumerate(users):
-            user_id = str(user.get('user_id', ''))
-            user_type = user.get('user_type', '')
-            
-            self.users_table.setItem(row, 0, QTableWidgetItem(user_id))
-            self.users_table.setItem(row, 1, QTableWidgetItem(user.get('fio', '')))
-            self.users_table.setItem(row, 2, QTableWidgetItem(user.get('phone', '')))
-            self.users_table.setItem(row, 3, QTableWidgetItem(user.get('login', '')))
-            self.users_table.setItem(row, 4, QTableWidgetItem(user_type))
-
-            # Добавляем QComboBox для смены роли
-            role_combo = QComboBox()
-            role_combo.addItems([
-                'Заказчик', 'Специалист', 'Оператор', 
-                'Менеджер', 'Менеджер по качеству'
-            ])
-            role_combo.setCurrentText(user_type)
-            role_combo.setProperty('user_id', user_id)
-            role_combo.currentTextChanged.connect(self.change_user_role)
-            
-            # Отключаем возможность смены роли для самого себя и админа
-            if user_id == str(self.current_user['user_id']) or user.get('login') == 'admin':
-                role_combo.setEnabled(False)
+        """Загрузка списка пользователей (первая страница, остальные — по прокрутке)"""
+        user_type = self.user_type_filter.currentData()
+        self.users_model.set_source(
+            lambda after_id: self.db.get_users_page(after_id, USERS_PAGE_SIZE, user_type)
+        )
 
-            self.users_table.setCellWidget(row, 5, role_combo)
+    def change_user_role(self, user_id, new_role):
+        """Смена роли пользователя (выбор в редакторе ячейки "Роль")"""
+        self.async_db.call(
+            None, 'set_user_role', user_id, new_role,
+            on_result=lambda success: self.on_user_role_changed(user_id, new_role, success),
+            on_error=self.show_db_error
+        )
 
-    def change_user_role(self, new_role):
-        """Смена роли пользователя через QComboBox"""
-        combo = self.sender()
-        user_id = int(combo.property('user_id'))
-        
-        if self.db.set_user_role(user_id, new_role):
+    def on_user_role_changed(self, user_id, new_role, success):
+        if success:
+            self.users_model.set_user_type(user_id, new_role)
             QMessageBox.information(self, 'Успех', f'Роль пользователя ID {user_id} изменена на "{new_role}"!')
         else:
             QMessageBox.critical(self, 'Ошибка', 'Не удалось изменить роль пользователя!')
-            # Перезагружаем список, чтобы вернуть старое значение в комбобоксе
-            self.load_users()
 
     def delete_user(self):
         """Удаление пользователя"""
-        selected_row = self.users_table.currentRow()
-        if selected_row < 0:
+        index = self.users_table.currentIndex()
+        if not index.isValid():
             QMessageBox.warning(self, 'Ошибка', 'Выберите пользователя для удаления!')
             return
 
-        user_id = int(self.users_table.item(selected_row, 0).text())
-        user_login = self.users_table.item(selected_row, 3).text()
+        user = self.users_model.user(index.row())
+        user_id = user['user_id']
+        user_login = user['login']
 
         if user_login == 'admin':
             QMessageBox.warning(self, 'Ошибка', 'Нельзя удалить администратора!')
@@ -550,15 +705,48 @@ class MainWindow(QMainWindow):
         )
 
         if reply == QMessageBox.StandardButton.Yes:
-            if self.db.delete_user(user_id):
-                QMessageBox.information(self, 'Успех', 'Пользователь удален!')
-                self.load_users()
-            else:
-                QMessageBox.critical(self, 'Ошибка', 'Не удалось удалить пользователя!')
+            self.async_db.call(
+                None, 'delete_user', user_id,
+                on_result=lambda success: self.on_user_deleted(user_id, success),
+                on_error=self.show_db_error
+            )
+
+    def on_user_deleted(self, user_id, success):
+        if success:
+            QMessageBox.information(self, 'Успех', 'Пользователь удален!')
+            self.users_model.remove_user(user_id)
+        else:
+            QMessageBox.critical(self, 'Ошибка', 'Не удалось удалить пользователя!')
 
-    def create_requests_tab(self):
+    def create_request_view(self, columns):
+        """Таблица заявок на общей модели RequestTableModel.
+
+        Между моделью и таблицей — RequestFilterProxyModel: сортировка по
+        щелчку на заголовке и фильтры выполняются по загруженным строкам.
+        """
+        model = RequestTableModel(columns, self, async_db=self.async_db, store=self.request_store)
+        proxy = RequestFilterProxyModel(self)
+        proxy.setSourceModel(model)
+        view = QTableView()
+        view.setModel(proxy)
+        # Пока пользователь не выбрал колонку — порядок запроса
+        view.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        view.setSortingEnabled(True)
+        view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        view.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        view.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        return view, model
+
+    @staticmethod
+    def selected_request_id(view):
+        """ID заявки в текущей строке таблицы или None"""
+        index = view.currentIndex()
+        if not index.isValid():
+            return None
+        return view.model().request_id(index.row())
+
+    def create_requests_tab(self, tab):
         """Вкладка со списком заявок"""
-        tab = QWidget()
         layout = QVBoxLayout()
 
         # Панель управления
@@ -570,16 +758,25 @@ class MainWindow(QMainWindow):
         self.status_filter.addItems([
             'Все', 'Новая заявка', 'В процессе ремонта', 'Готова к выдаче'
         ])
-        self.status_filter.currentTextChanged.connect(self.load_requests)
+        self.status_filter.currentTextChanged.connect(self.apply_request_filters)
 
         # Поиск
         search_label = QLabel('Поиск:')
         self.search_input = QLineEdit()
-        self.search_input.setPlaceholderText('Введите запрос для поиска...')
+        self.search_input.setPlaceholderText('Телефон, ФИО, модель, номер заявки...')
         self.search_input.setStyleSheet("color: #2C3E50; background-color: #FFFFFF;")
         search_btn = QPushButton('Найти')
         search_btn.clicked.connect(self.search_requests)
 
+        # Поиск по мере ввода: запрос уходит после паузы в наборе
+        self.search_handle = None
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.search_requests)
+        self.search_input.textChanged.connect(self.search_timer.start)
+        self.search_input.returnPressed.connect(self.search_requests)
+
         control_panel.addWidget(status_label)
         control_panel.addWidget(self.status_filter)
         control_panel.addWidget(search_label)
@@ -593,39 +790,67 @@ class MainWindow(QMainWindow):
             add_btn.clicked.connect(self.show_add_request_dialog)
             control_panel.addWidget(add_btn)
 
+        # Групповые изменения выделенных заявок
+        if self.is_admin or self.current_user['user_type'] in ['Менеджер', 'Оператор', 'Менеджер по качеству']:
+            bulk_btn = QPushButton('Изменить выбранные')
+            bulk_btn.clicked.connect(self.show_bulk_edit_dialog)
+            control_panel.addWidget(bulk_btn)
+
         # Кнопка обновления
         refresh_btn = QPushButton('Обновить')
-        refresh_btn.clicked.connect(self.load_requests)
+        refresh_btn.clicked.connect(self.refresh_requests)
         control_panel.addWidget(refresh_btn)
 
         layout.addLayout(control_panel)
 
+        # Фильтры по мастеру и периоду (применяются к загруженным строкам)
+        filter_panel = QHBoxLayout()
+
+        self.master_filter = QComboBox()
+        self.master_filter.addItem('Все', None)
+        self.master_filter.addItem('Не назначен', NO_MASTER)
+        self.master_filter.currentIndexChanged.connect(self.apply_request_filters)
+
+        self.period_check = QCheckBox('Период с')
+        self.date_from_filter = QDateEdit(QDate.currentDate().addMonths(-1))
+        self.date_from_filter.setCalendarPopup(True)
+        self.date_to_filter = QDateEdit(QDate.currentDate())
+        self.date_to_filter.setCalendarPopup(True)
+        self.period_check.toggled.connect(self.apply_request_filters)
+        self.date_from_filter.dateChanged.connect(self.apply_request_filters)
+        self.date_to_filter.dateChanged.connect(self.apply_request_filters)
+
+        filter_panel.addWidget(QLabel('Мастер:'))
+        filter_panel.addWidget(self.master_filter)
+        filter_panel.addWidget(self.period_check)
+        filter_panel.addWidget(self.date_from_filter)
+        filter_panel.addWidget(QLabel('по'))
+        filter_panel.addWidget(self.date_to_filter)
+        filter_panel.addStretch()
+
+        layout.addLayout(filter_panel)
+
+        self.async_db.call(
+            'master_filter', 'get_specialists_cached',
+            on_result=self.fill_master_filter, on_error=self.show_db_error
+        )
+
         # Таблица заявок
-        self.requests_table = QTableWidget()
-        self.requests_table.setColumnCount(8)
-        self.requests_table.setHorizontalHeaderLabels([
-            'ID', 'Дата', 'Тип техники', 'Модель', 'Проблема',
-            'Статус', 'Клиент', 'Мастер'
-        ])
-        self.requests_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.requests_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.requests_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.requests_table, self.requests_model = self.create_request_view(
+            ['id', 'date', 'type', 'model', 'problem', 'status', 'client', 'master']
+        )
+        self.requests_table.setSelectionMode(QTableView.SelectionMode.ExtendedSelection)
+        self.requests_proxy = self.requests_table.model()
+        # Фильтр, по которому загружены строки модели (None — результаты поиска)
+        self.requests_source_filter = None
         self.requests_table.doubleClicked.connect(self.show_request_details)
 
         layout.addWidget(self.requests_table)
 
         tab.setLayout(layout)
-        self.tabs.addTab(tab, 'Все заявки')
 
-        # Загрузка данных
-        self.load_requests()
-
-    def create_my_requests_tab(self):
+    def create_my_requests_tab(self, tab):
         """Вкладка с моими заявками (для заказчиков и специалистов)"""
-        if self.is_admin or self.current_user['user_type'] not in ['Заказчик', 'Специалист']:
-            return
-
-        tab = QWidget()
         layout = QVBoxLayout()
 
         if self.current_user['user_type'] == 'Заказчик':
@@ -639,76 +864,57 @@ class MainWindow(QMainWindow):
         layout.addWidget(title)
 
         refresh_my_btn = QPushButton('Обновить')
-        refresh_my_btn.clicked.connect(self.load_my_requests)
+        refresh_my_btn.clicked.connect(self.sync_requests)
         layout.addWidget(refresh_my_btn)
 
-        self.my_requests_table = QTableWidget()
-        self.my_requests_table.setColumnCount(6)
-        self.my_requests_table.setHorizontalHeaderLabels([
-            'ID', 'Дата', 'Тип техники', 'Модель', 'Проблема', 'Статус'
-        ])
-        self.my_requests_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.my_requests_table, self.my_requests_model = self.create_request_view(
+            ['id', 'date', 'type', 'model', 'problem', 'status']
+        )
         self.my_requests_table.doubleClicked.connect(self.show_my_request_details)
 
         layout.addWidget(self.my_requests_table)
 
         tab.setLayout(layout)
 
-        if self.current_user['user_type'] == 'Заказчик':
-            self.tabs.addTab(tab, 'Мои заявки')
-        elif self.current_user['user_type'] == 'Специалист':
-            self.tabs.addTab(tab, 'Мои задачи')
-        else:
-            self.tabs.addTab(tab, 'Мои заявки')
-
     def load_my_requests(self):
         """Загрузка заявок текущего пользователя"""
         if not hasattr(self, 'my_requests_table'):
             return
 
-        all_requests = self.db.get_all_requests(None)
-
-        # Фильтруем заявки по текущему пользователю
-        my_requests = []
-        for req in all_requests:
-            if self.current_user['user_type'] == 'Заказчик':
-                # Заказчик видит свои заявки (по client_name)
-                if req.get('client_name') == self.current_user['fio']:
-                    my_requests.append(req)
-            elif self.current_user['user_type'] == 'Специалист':
-                # Специалист видит назначенные ему заявки
-                if req.get('master_name') == self.current_user['fio']:
-                    my_requests.append(req)
-            elif self.is_admin:
-                # Админ видит все
-                my_requests.append(req)
-
-        self.my_requests_table.setRowCount(len(my_requests))
-
-        for row, request in enumerate(my_requests):
-            self.my_requests_table.setItem(row, 0, QTableWidgetItem(str(request['request_id'])))
-            self.my_requests_table.setItem(row, 1, QTableWidgetItem(str(request['start_date'])))
-            self.my_requests_table.setItem(row, 2, QTableWidgetItem(request['climate_tech_type']))
-            self.my_requests_table.setItem(row, 3, QTableWidgetItem(request['climate_tech_model']))
-            problem_short = request['problem_description'][:50] + '...' if len(request['problem_description']) > 50 else request['problem_description']
-            self.my_requests_table.setItem(row, 4, QTableWidgetItem(problem_short))
-            self.my_requests_table.setItem(row, 5, QTableWidgetItem(request['request_status']))
+        # Отбор по user_id выполняется на сервере по индексам,
+        # следующие страницы подгружаются при прокрутке
+        user_id = self.current_user['user_id']
+        if self.current_user['user_type'] == 'Заказчик':
+            self.my_requests_model.set_source(
+                lambda after_id: self.db.get_requests_for_client(user_id, after_id, PAGE_SIZE),
+                accepts=by_client(user_id)
+            )
+        elif self.current_user['user_type'] == 'Специалист':
+            self.my_requests_model.set_source(
+                lambda after_id: self.db.get_requests_for_master(user_id, after_id, PAGE_SIZE),
+                accepts=by_master(user_id)
+            )
+        elif self.is_admin:
+            # Админ видит все
+            self.my_requests_model.set_source(
+                lambda after_id: self.db.get_requests_page(after_id, PAGE_SIZE),
+                accepts=by_status(None)
+            )
+        else:
+            self.my_requests_model.set_rows([])
 
     def show_my_request_details(self):
         """Показать детали заявки из вкладки Мои заявки"""
-        selected_row = self.my_requests_table.currentRow()
-        if selected_row < 0:
+        request_id = self.selected_request_id(self.my_requests_table)
+        if request_id is None:
             return
 
-        request_id = int(self.my_requests_table.item(selected_row, 0).text())
         dialog = RequestDetailsDialog(self.db, self.current_user, request_id, self, is_admin=self.is_admin)
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_my_requests()
-            self.load_requests()
+            self.requests_changed([request_id])
 
-    def create_statistics_tab(self):
+    def create_statistics_tab(self, tab):
         """Вкладка со статистикой"""
-        tab = QWidget()
         layout = QVBoxLayout()
 
         # Заголовок
@@ -753,14 +959,9 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.stats_text)
 
         tab.setLayout(layout)
-        self.tabs.addTab(tab, 'Статистика')
 
-        # Загрузка статистики
-        self.load_statistics()
-
-    def create_qr_code_tab(self):
+    def create_qr_code_tab(self, tab):
         """Вкладка для генерации QR-кода"""
-        tab = QWidget()
         layout = QVBoxLayout()
 
         # Заголовок
@@ -784,7 +985,6 @@ class MainWindow(QMainWindow):
 
         layout.addStretch(1)
         tab.setLayout(layout)
-        self.tabs.addTab(tab, 'QR-код')
 
     def show_qr_code_dialog(self):
         """Показать диалог с QR-кодом"""
@@ -792,79 +992,142 @@ class MainWindow(QMainWindow):
         dialog = QRCodeDialog(None, self, url)
         dialog.exec()
 
+    def fill_master_filter(self, specialists):
+        """Специалисты в фильтре по мастеру"""
+        for spec in specialists:
+            self.master_filter.addItem(spec['fio'], spec['user_id'])
+
+    def request_filter(self):
+        """Текущие фильтры вкладки заявок (аргументы get_requests_page)"""
+        status = self.status_filter.currentText()
+        period = self.period_check.isChecked()
+        return {
+            'status': None if status == 'Все' else status,
+            'master_id': self.master_filter.currentData(),
+            'date_from': self.date_from_filter.date().toPyDate() if period else None,
+            'date_to': self.date_to_filter.date().toPyDate() if period else None,
+        }
+
+    def apply_request_filters(self):
+        """Смена фильтра: по загруженным строкам, если их достаточно,
+        иначе — запрос к серверу"""
+        filters = self.request_filter()
+        self.requests_proxy.set_filter(filters)
+
+        loaded = self.requests_source_filter
+        if loaded is None:
+            # Фильтруем результаты поиска
+            return
+        if loaded == filters:
+            return
+        if self.requests_model.is_complete() and filter_covers(loaded, filters):
+            return
+        self.load_requests()
+
     def load_requests(self):
         """Загрузка списка заявок"""
-        status = self.status_filter.currentText()
-        status = None if status == 'Все' else status
+        filters = self.request_filter()
 
-        requests = self.db.get_all_requests(status)
+        # Устаревший результат поиска не должен перезаписать список
+        self.cancel_search()
 
-        self.requests_table.setRowCount(len(requests))
+        self.requests_proxy.set_filter(filters)
+        self.requests_source_filter = filters
 
-        for row, request in enumerate(requests):
-            self.requests_table.setItem(row, 0, QTableWidgetItem(str(request['request_id'])))
-            self.requests_table.setItem(row, 1, QTableWidgetItem(str(request['start_date'])))
-            self.requests_table.setItem(row, 2, QTableWidgetItem(request['climate_tech_type']))
-            self.requests_table.setItem(row, 3, QTableWidgetItem(request['climate_tech_model']))
-            problem_short = request['problem_description'][:50] + '...' if len(request['problem_description']) > 50 else request['problem_description']
-            self.requests_table.setItem(row, 4, QTableWidgetItem(problem_short))
-            self.requests_table.setItem(row, 5, QTableWidgetItem(request['request_status']))
-            self.requests_table.setItem(row, 6, QTableWidgetItem(request['client_name']))
-            self.requests_table.setItem(row, 7, QTableWidgetItem(request.get('master_name', '') or 'Не назначен'))
+        # Первая страница сразу, остальные — по мере прокрутки
+        self.requests_model.set_source(
+            lambda after_id: self.db.get_requests_page(after_id, PAGE_SIZE, **filters),
+            accepts=matches_filter(filters)
+        )
+
+    def cancel_search(self):
+        """Отмена выполняющегося поиска (в т.ч. на сервере, без ожидания ответа)"""
+        self.search_timer.stop()
+        if self.search_handle is not None:
+            self.search_handle.cancel()
+            self.search_handle = None
+        self.async_db.cancel('search')
 
     def search_requests(self):
-        """Поиск заявок"""
+        """Поиск заявок (вызывается по мере ввода и по кнопке)"""
         search_term = self.search_input.text().strip()
 
+        self.cancel_search()
+
         if not search_term:
-            QMessageBox.warning(self, 'Предупреждение', 'Введите поисковый запрос!')
+            # Поле очищено — возвращаем обычный список
+            self.statusBar().clearMessage()
+            self.load_requests()
             return
 
-        requests = self.db.search_requests(search_term)
-
-        if not requests:
-            QMessageBox.information(self, 'Результаты поиска', 'По вашему запросу ничего не найдено.')
-            return
+        self.search_handle = QueryHandle()
+        self.async_db.call(
+            'search', 'search_requests_ranked', search_term,
+            limit=500, timeout_ms=SEARCH_TIMEOUT_MS, handle=self.search_handle,
+            on_result=self.show_search_results, on_error=self.on_search_error
+        )
 
-        self.requests_table.setRowCount(len(requests))
+    def show_search_results(self, requests):
+        """Вывод результатов поиска"""
+        self.search_handle = None
+        self.requests_source_filter = None
+        self.requests_model.set_rows(requests)
+        if requests:
+            self.statusBar().showMessage(f'Найдено заявок: {len(requests)}')
+        else:
+            self.statusBar().showMessage('По вашему запросу ничего не найдено.')
 
-        for row, request in enumerate(requests):
-            self.requests_table.setItem(row, 0, QTableWidgetItem(str(request['request_id'])))
-            self.requests_table.setItem(row, 1, QTableWidgetItem(str(request['start_date'])))
-            self.requests_table.setItem(row, 2, QTableWidgetItem(request['climate_tech_type']))
-            self.requests_table.setItem(row, 3, QTableWidgetItem(request['climate_tech_model']))
-            problem_short = request['problem_description'][:50] + '...' if len(request['problem_description']) > 50 else request['problem_description']
-            self.requests_table.setItem(row, 4, QTableWidgetItem(problem_short))
-            self.requests_table.setItem(row, 5, QTableWidgetItem(request['request_status']))
-            self.requests_table.setItem(row, 6, QTableWidgetItem(request['client_name']))
-            self.requests_table.setItem(row, 7, QTableWidgetItem(request.get('master_name', '') or ''))
+    def on_search_error(self, error):
+        """Ошибка поиска: превышение времени — не повод для окна с ошибкой"""
+        self.search_handle = None
+        if isinstance(error, QueryCanceledError):
+            self.statusBar().showMessage('Поиск занял слишком много времени, уточните запрос.')
+        else:
+            self.show_db_error(error)
 
     def show_add_request_dialog(self):
         """Показать диалог добавления заявки"""
         dialog = AddRequestDialog(self.db, self.current_user, self)
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_requests()
+            self.requests_changed([dialog.request_id])
             QMessageBox.information(self, 'Успех', 'Заявка успешно создана!')
 
+    def show_bulk_edit_dialog(self):
+        """Групповое изменение выделенных заявок"""
+        request_ids = [
+            self.requests_proxy.request_id(index.row())
+            for index in self.requests_table.selectionModel().selectedRows()
+        ]
+        if not request_ids:
+            QMessageBox.warning(self, 'Ошибка', 'Выберите одну или несколько заявок!')
+            return
+
+        dialog = BulkEditDialog(self.db, request_ids, self)
+        if dialog.exec() == QDialog.DialogCode.Accepted:
+            self.requests_changed(request_ids)
+
     def show_request_details(self):
         """Показать детали заявки"""
-        selected_row = self.requests_table.currentRow()
-        if selected_row < 0:
+        request_id = self.selected_request_id(self.requests_table)
+        if request_id is None:
             return
 
-        request_id = int(self.requests_table.item(selected_row, 0).text())
         dialog = RequestDetailsDialog(self.db, self.current_user, request_id, self, is_admin=self.is_admin)
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.load_requests()
-            if hasattr(self, 'my_requests_table'):
-                self.load_my_requests()
+            self.requests_changed([request_id])
 
     def load_statistics(self):
         """Загрузка статистики"""
         if not hasattr(self, 'stats_text'):
             return
-            
-        stats = self.db.get_statistics()
+
+        self.async_db.call(
+            'statistics', 'get_statistics',
+            on_result=self.show_statistics, on_error=self.show_db_error
+        )
+
+    def show_statistics(self, stats):
+        """Вывод статистики"""
 
         text = f"""
         <div style="color: #ECF0F1;">
@@ -889,9 +1152,8 @@ class MainWindow(QMainWindow):
 
         self.stats_text.setHtml(text)
 
-    def create_available_requests_tab(self):
+    def create_available_requests_tab(self, tab):
         """Вкладка с доступными заявками для специалистов"""
-        tab = QWidget()
         layout = QVBoxLayout()
 
         title = QLabel('Доступные заявки (без назначенного специалиста)')
@@ -899,17 +1161,12 @@ class MainWindow(QMainWindow):
         layout.addWidget(title)
 
         refresh_btn = QPushButton('Обновить')
-        refresh_btn.clicked.connect(self.load_available_requests)
+        refresh_btn.clicked.connect(self.sync_requests)
         layout.addWidget(refresh_btn)
 
-        self.available_requests_table = QTableWidget()
-        self.available_requests_table.setColumnCount(6)
-        self.available_requests_table.setHorizontalHeaderLabels([
-            'ID', 'Дата', 'Тип техники', 'Модель', 'Проблема', 'Статус'
-        ])
-        self.available_requests_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.available_requests_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.available_requests_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.available_requests_table, self.available_requests_model = self.create_request_view(
+            ['id', 'date', 'type', 'model', 'problem', 'status', 'due']
+        )
 
         layout.addWidget(self.available_requests_table)
 
@@ -931,44 +1188,32 @@ class MainWindow(QMainWindow):
         respond_btn.clicked.connect(self.respond_to_request)
         layout.addWidget(respond_btn)
 
-        tab.setLayout(layout)
-        self.tabs.addTab(tab, 'Доступные заявки')
+        # Кнопка "Взять ближайшую по сроку" — без выбора строки и без гонок
+        claim_btn = QPushButton('Взять ближайшую по сроку заявку')
+        claim_btn.clicked.connect(self.claim_next_request)
+        layout.addWidget(claim_btn)
 
-        self.load_available_requests()
+        tab.setLayout(layout)
 
     def load_available_requests(self):
         """Загрузка заявок без назначенного специалиста"""
         if not hasattr(self, 'available_requests_table'):
             return
 
-        all_requests = self.db.get_all_requests(None)
-
-        # Фильтруем заявки без назначенного мастера
-        available = [
-            req for req in all_requests 
-            if not req.get('master_name') or req.get('master_name') == 'Не назначен'
-        ]
-
-        self.available_requests_table.setRowCount(len(available))
-
-        for row, request in enumerate(available):
-            self.available_requests_table.setItem(row, 0, QTableWidgetItem(str(request['request_id'])))
-            self.available_requests_table.setItem(row, 1, QTableWidgetItem(str(request['start_date'])))
-            self.available_requests_table.setItem(row, 2, QTableWidgetItem(request['climate_tech_type']))
-            self.available_requests_table.setItem(row, 3, QTableWidgetItem(request['climate_tech_model']))
-            problem_short = request['problem_description'][:50] + '...' if len(request['problem_description']) > 50 else request['problem_description']
-            self.available_requests_table.setItem(row, 4, QTableWidgetItem(problem_short))
-            self.available_requests_table.setItem(row, 5, QTableWidgetItem(request['request_status']))
+        # Заявки без назначенного мастера, ближайшие по сроку — первыми
+        self.available_requests_model.set_source(
+            lambda after: self.db.get_unassigned_requests(PAGE_SIZE, after),
+            accepts=unassigned,
+            sort_key=by_due_date
+        )
 
     def respond_to_request(self):
         """Специалист откликается на заявку"""
-        selected_row = self.available_requests_table.currentRow()
-        if selected_row < 0:
+        request_id = self.selected_request_id(self.available_requests_table)
+        if request_id is None:
             QMessageBox.warning(self, 'Ошибка', 'Выберите заявку для отклика!')
             return
 
-        request_id = int(self.available_requests_table.item(selected_row, 0).text())
-
         reply = QMessageBox.question(
             self,
             'Подтверждение',
@@ -977,15 +1222,36 @@ class MainWindow(QMainWindow):
         )
 
         if reply == QMessageBox.StandardButton.Yes:
-            # Используем метод assign_master из database_module
-            success = self.db.assign_master(request_id, self.current_user['user_id'])
-            if success:
-                QMessageBox.information(self, 'Успех', f'Вы успешно взяли заявку #{request_id} в работу!')
-                self.load_available_requests()
-                self.load_my_requests()
-                self.load_requests()
-            else:
-                QMessageBox.critical(self, 'Ошибка', 'Не удалось взять заявку!')
+            self.async_db.call(
+                None, 'assign_master', request_id, self.current_user['user_id'],
+                on_result=lambda success: self.on_request_taken(request_id, success),
+                on_error=self.show_db_error
+            )
+
+    def on_request_taken(self, request_id, success):
+        """Результат отклика на заявку"""
+        if success:
+            QMessageBox.information(self, 'Успех', f'Вы успешно взяли заявку #{request_id} в работу!')
+        else:
+            QMessageBox.critical(self, 'Ошибка', 'Не удалось взять заявку!')
+        # Даже при неудаче: возможно, заявку уже взял другой специалист
+        self.requests_changed([request_id])
+
+    def claim_next_request(self):
+        """Специалист берёт в работу свободную заявку с ближайшим сроком"""
+        self.async_db.call(
+            None, 'claim_next_requests', self.current_user['user_id'], 1,
+            on_result=self.on_request_claimed, on_error=self.show_db_error
+        )
+
+    def on_request_claimed(self, claimed):
+        """Результат claim_next_request"""
+        if claimed:
+            QMessageBox.information(self, 'Успех', f'Вы взяли заявку #{claimed[0]} в работу!')
+            self.requests_changed(claimed)
+        else:
+            QMessageBox.information(self, 'Нет заявок', 'Свободных заявок нет.')
+            self.invalidate_tabs('available')
 
 
 class AddRequestDialog(QDialog):
@@ -995,6 +1261,7 @@ class AddRequestDialog(QDialog):
         super().__init__(parent)
         self.db = db
         self.current_user = user
+        self.request_id = None
         self.init_ui()
 
     def init_ui(self):
@@ -1050,14 +1317,14 @@ class AddRequestDialog(QDialog):
             QMessageBox.warning(self, 'Ошибка', 'Пожалуйста, заполните все поля!')
             return
 
-        request_id = self.db.add_request(
+        self.request_id = self.db.add_request(
             tech_type,
             model,
             problem,
             self.current_user['user_id']
         )
 
-        if request_id:
+        if self.request_id:
             self.accept()
         else:
             QMessageBox.critical(self, 'Ошибка', 'Не удалось создать заявку!')
@@ -1072,38 +1339,23 @@ class RequestDetailsDialog(QDialog):
         self.current_user = user
         self.request_id = request_id
         self.is_admin = is_admin
+        self.request_data = None
+        self.can_assign_master = self.is_admin or self.current_user['user_type'] in ['Менеджер', 'Оператор']
+        self.async_db = AsyncDatabase(db, self)
         self.init_ui()
+        self.load_request()
 
     def init_ui(self):
-        """Инициализация интерфейса"""
+        """Инициализация интерфейса (данные подставляются после загрузки)"""
         self.setWindowTitle(f'Детали заявки #{self.request_id}')
-        self.setFixedSize(500, 650)
+        self.setFixedSize(500, 800)
 
         layout = QFormLayout()
 
-        # Получаем данные заявки через метод get_request_by_id
-        request_data = self.db.get_request_by_id(self.request_id)
-        
-        # Если метод не нашел заявку, ищем вручную
-        if not request_data:
-            all_requests = self.db.get_all_requests(None)
-            for req in all_requests:
-                if req['request_id'] == self.request_id:
-                    request_data = req
-                    break
-
-        if not request_data:
-            QMessageBox.warning(self, 'Ошибка', 'Заявка не найдена!')
-            self.reject()
-            return
-        
-        self.request_data = request_data
-
         # Поля для отображения
-        self.type_label = QLabel(request_data.get('climate_tech_type', ''))
-        self.model_label = QLabel(request_data.get('climate_tech_model', ''))
+        self.type_label = QLabel('Загрузка...')
+        self.model_label = QLabel('')
         self.problem_text = QTextEdit()
-        self.problem_text.setPlainText(request_data.get('problem_description', ''))
         self.problem_text.setReadOnly(True)
         self.problem_text.setStyleSheet("color: #ECF0F1; background-color: #f0f0f0;")
 
@@ -1111,7 +1363,6 @@ class RequestDetailsDialog(QDialog):
         self.status_combo.addItems([
             'Новая заявка', 'В процессе ремонта', 'Готова к выдаче'
         ])
-        self.status_combo.setCurrentText(request_data.get('request_status', 'Новая заявка'))
 
         if not self.is_admin and self.current_user['user_type'] == 'Заказчик':
             self.status_combo.setEnabled(False)
@@ -1121,41 +1372,35 @@ class RequestDetailsDialog(QDialog):
         layout.addRow('Описание:', self.problem_text)
         layout.addRow('Статус:', self.status_combo)
 
-        client_label = QLabel(request_data.get('client_name', 'Не указан'))
-        layout.addRow('Клиент:', client_label)
-        
-        can_assign_master = self.is_admin or self.current_user['user_type'] in ['Менеджер', 'Оператор']
-        
-        if can_assign_master:
+        self.client_label = QLabel('')
+        layout.addRow('Клиент:', self.client_label)
+
+        if self.can_assign_master:
             self.master_combo = QComboBox()
             self.master_combo.addItem('Не назначен', None)
-            
-            # Получаем список специалистов через метод get_specialists
-            specialists = self.db.get_specialists()
-            for spec in specialists:
-                self.master_combo.addItem(spec['fio'], spec['user_id'])
-            
-            # Устанавливаем текущего мастера если есть
-            current_master = request_data.get('master_name')
-            if current_master and current_master != 'Не назначен':
-                index = self.master_combo.findText(current_master)
-                if index >= 0:
-                    self.master_combo.setCurrentIndex(index)
-            
             layout.addRow('Специалист:', self.master_combo)
         else:
-            master_label = QLabel(request_data.get('master_name', 'Не назначен') or 'Не назначен')
-            layout.addRow('Мастер:', master_label)
+            self.master_label = QLabel('')
+            layout.addRow('Мастер:', self.master_label)
+
+        # Комментарии: первая страница приходит с заявкой, остальные — при прокрутке
+        self.comments_model = CommentListModel(self, async_db=self.async_db)
+        self.comments_view = QListView()
+        self.comments_view.setModel(self.comments_model)
+        self.comments_view.setWordWrap(True)
+        self.comments_view.setAlternatingRowColors(True)
+        layout.addRow('Комментарии:', self.comments_view)
 
-        save_btn = QPushButton('Сохранить изменения')
-        save_btn.clicked.connect(self.save_changes)
+        self.save_btn = QPushButton('Сохранить изменения')
+        self.save_btn.setEnabled(False)
+        self.save_btn.clicked.connect(self.save_changes)
 
         cancel_btn = QPushButton('Закрыть')
         cancel_btn.clicked.connect(self.reject)
 
         btn_layout = QHBoxLayout()
         if self.is_admin or self.current_user['user_type'] not in ['Заказчик']:
-            btn_layout.addWidget(save_btn)
+            btn_layout.addWidget(self.save_btn)
         btn_layout.addWidget(cancel_btn)
 
         main_layout = QVBoxLayout()
@@ -1163,15 +1408,65 @@ class RequestDetailsDialog(QDialog):
         main_layout.addLayout(btn_layout)
         self.setLayout(main_layout)
 
+    def load_request(self):
+        """Фоновая загрузка заявки, комментариев и специалистов одним запросом"""
+        self.async_db.call(
+            'details', 'get_request_details', self.request_id,
+            comments_limit=COMMENTS_PAGE_SIZE,
+            with_specialists=self.can_assign_master,
+            on_result=self.show_request, on_error=self.show_error
+        )
+
+    def show_error(self, error):
+        QMessageBox.critical(self, 'Ошибка', f'Не удалось загрузить заявку: {error}')
+        self.reject()
+
+    def show_request(self, details):
+        """Заполнение полей загруженными данными"""
+        if not details:
+            QMessageBox.warning(self, 'Ошибка', 'Заявка не найдена!')
+            self.reject()
+            return
+
+        request_data = details['request']
+        specialists = details['specialists']
+
+        self.request_data = request_data
+
+        self.type_label.setText(request_data.get('climate_tech_type', ''))
+        self.model_label.setText(request_data.get('climate_tech_model', ''))
+        self.problem_text.setPlainText(request_data.get('problem_description', ''))
+        self.status_combo.setCurrentText(request_data.get('request_status', 'Новая заявка'))
+        self.client_label.setText(request_data.get('client_name', 'Не указан'))
+
+        if self.can_assign_master:
+            for spec in specialists:
+                self.master_combo.addItem(spec['fio'], spec['user_id'])
+
+            # Устанавливаем текущего мастера если есть (по ID: ФИО могут совпадать)
+            master_id = request_data.get('master_id')
+            if master_id is not None:
+                index = self.master_combo.findData(master_id)
+                if index >= 0:
+                    self.master_combo.setCurrentIndex(index)
+        else:
+            self.master_label.setText(request_data.get('master_name', 'Не назначен') or 'Не назначен')
+
+        request_id = self.request_id
+        self.comments_model.set_first_page(
+            details['comments'], details['comments_after'],
+            lambda after: self.db.get_comments_page(request_id, after, COMMENTS_PAGE_SIZE)
+        )
+
+        self.save_btn.setEnabled(True)
+
     def save_changes(self):
         """Сохранение изменений"""
         new_status = self.status_combo.currentText()
-        
-        can_assign_master = self.is_admin or self.current_user['user_type'] in ['Менеджер', 'Оператор']
-        
+
         try:
             # Сначала назначаем мастера (до изменения статуса!)
-            if can_assign_master and hasattr(self, 'master_combo'):
+            if self.can_assign_master:
                 master_id = self.master_combo.currentData()
                 if master_id:
                     success = self.db.assign_master(self.request_id, master_id)
@@ -1192,6 +1487,103 @@ class RequestDetailsDialog(QDialog):
             QMessageBox.critical(self, 'Ошибка', f'Не удалось обновить заявку: {e}')
 
 
+class BulkEditDialog(QDialog):
+    """Диалог группового изменения заявок (статус, специалист, срок)"""
+
+    def __init__(self, db, request_ids, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.request_ids = request_ids
+        self.async_db = AsyncDatabase(db, self)
+        self.init_ui()
+        self.async_db.call(
+            'specialists', 'get_specialists_cached',
+            on_result=self.fill_master_combo, on_error=self.show_error
+        )
+
+    def init_ui(self):
+        """Инициализация интерфейса"""
+        self.setWindowTitle(f'Групповое изменение ({len(self.request_ids)} заявок)')
+        self.setFixedSize(450, 250)
+
+        layout = QFormLayout()
+
+        self.status_combo = QComboBox()
+        self.status_combo.addItem('Не менять', None)
+        for status in ['Новая заявка', 'В процессе ремонта', 'Готова к выдаче']:
+            self.status_combo.addItem(status, status)
+
+        self.master_combo = QComboBox()
+        self.master_combo.addItem('Не менять', None)
+
+        self.due_date_check = QCheckBox('Изменить срок')
+        self.due_date_edit = QDateEdit(QDate.currentDate().addDays(7))
+        self.due_date_edit.setCalendarPopup(True)
+        self.due_date_edit.setEnabled(False)
+        self.due_date_check.toggled.connect(self.due_date_edit.setEnabled)
+
+        layout.addRow('Статус:', self.status_combo)
+        layout.addRow('Специалист:', self.master_combo)
+        layout.addRow(self.due_date_check, self.due_date_edit)
+
+        apply_btn = QPushButton('Применить')
+        apply_btn.clicked.connect(self.apply_changes)
+        cancel_btn = QPushButton('Отмена')
+        cancel_btn.clicked.connect(self.reject)
+
+        btn_layout = QHBoxLayout()
+        btn_layout.addWidget(apply_btn)
+        btn_layout.addWidget(cancel_btn)
+
+        main_layout = QVBoxLayout()
+        main_layout.addLayout(layout)
+        main_layout.addLayout(btn_layout)
+        self.setLayout(main_layout)
+
+    def fill_master_combo(self, specialists):
+        """Специалисты в списке (подставляются после фоновой загрузки)"""
+        for spec in specialists:
+            self.master_combo.addItem(spec['fio'], spec['user_id'])
+
+    def show_error(self, error):
+        QMessageBox.critical(self, 'Ошибка', f'Не удалось загрузить специалистов: {error}')
+
+    def apply_changes(self):
+        """Применение изменений групповыми запросами"""
+        master_id = self.master_combo.currentData()
+        new_status = self.status_combo.currentData()
+        change_due_date = self.due_date_check.isChecked()
+
+        if master_id is None and new_status is None and not change_due_date:
+            QMessageBox.warning(self, 'Ошибка', 'Не выбрано ни одного изменения!')
+            return
+
+        failed = set()
+        # Как и в RequestDetailsDialog: сначала специалист, потом статус
+        if master_id is not None:
+            outcome = self.db.bulk_assign_master(self.request_ids, master_id)
+            failed.update(rid for rid, ok in outcome.items() if not ok)
+        if new_status is not None:
+            outcome = self.db.bulk_update_status(self.request_ids, new_status)
+            failed.update(rid for rid, ok in outcome.items() if not ok)
+        if change_due_date:
+            new_due = self.due_date_edit.date().toPyDate()
+            outcome = self.db.bulk_update_due_date(self.request_ids, new_due)
+            failed.update(rid for rid, ok in outcome.items() if not ok)
+
+        if failed:
+            QMessageBox.warning(
+                self,
+                'Предупреждение',
+                'Не удалось изменить заявки: '
+                + ', '.join(f'#{rid}' for rid in sorted(failed))
+                + '\nВозможно, они уже завершены.'
+            )
+        else:
+            QMessageBox.information(self, 'Успех', f'Обновлено заявок: {len(self.request_ids)}')
+        self.accept()
+
+
 if __name__ == '__main__':
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
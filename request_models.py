@@ -0,0 +1,488 @@
+import bisect
+import datetime
+
+from PyQt6.QtCore import (
+    Qt, QAbstractListModel, QAbstractTableModel, QModelIndex, QObject,
+    QSortFilterProxyModel, pyqtSignal
+)
+
+from database_module import NO_MASTER
+
+
+# Поля заявки в порядке хранения строки (кортеж вместо словаря на строку)
+REQUEST_FIELDS = (
+    'request_id', 'start_date', 'climate_tech_type', 'climate_tech_model',
+    'problem_description', 'request_status', 'due_date', 'completion_date',
+    'client_name', 'master_name', 'client_id', 'master_id'
+)
+FIELD_INDEX = {name: i for i, name in enumerate(REQUEST_FIELDS)}
+
+# Колонки таблиц: ключ -> (заголовок, поле)
+REQUEST_COLUMNS = {
+    'id': ('ID', 'request_id'),
+    'date': ('Дата', 'start_date'),
+    'type': ('Тип техники', 'climate_tech_type'),
+    'model': ('Модель', 'climate_tech_model'),
+    'problem': ('Проблема', 'problem_description'),
+    'status': ('Статус', 'request_status'),
+    'due': ('Срок', 'due_date'),
+    'client': ('Клиент', 'client_name'),
+    'master': ('Мастер', 'master_name'),
+}
+
+# Размер страницы при подгрузке по прокрутке
+PAGE_SIZE = 200
+COMMENTS_PAGE_SIZE = 50
+
+
+def request_to_row(request: dict) -> tuple:
+    """Словарь заявки из Database -> компактная строка модели"""
+    return tuple(request.get(name) for name in REQUEST_FIELDS)
+
+
+def format_cell(field: str, value) -> str:
+    """Текст ячейки; вычисляется только для видимых ячеек"""
+    if field == 'problem_description':
+        value = value or ''
+        return value[:50] + '...' if len(value) > 50 else value
+    if field == 'master_name':
+        return value or 'Не назначен'
+    return '' if value is None else str(value)
+
+
+# ----- отбор и порядок строк (повторяют WHERE/ORDER BY запросов Database) -----
+
+def by_status(status):
+    """get_requests_page(status=...); None — все заявки"""
+    if status is None:
+        return lambda row: True
+    return lambda row: row[FIELD_INDEX['request_status']] == status
+
+
+def by_client(user_id):
+    """get_requests_for_client"""
+    return lambda row: row[FIELD_INDEX['client_id']] == user_id
+
+
+def by_master(user_id):
+    """get_requests_for_master"""
+    return lambda row: row[FIELD_INDEX['master_id']] == user_id
+
+
+def unassigned(row) -> bool:
+    """get_unassigned_requests"""
+    return row[FIELD_INDEX['master_id']] is None
+
+
+def matches_filter(filters: dict):
+    """Отбор по фильтру вкладки заявок — те же условия, что у
+    get_requests_page(**filters): status, master_id, date_from, date_to"""
+    status = filters.get('status')
+    master_id = filters.get('master_id')
+    date_from = filters.get('date_from')
+    date_to = filters.get('date_to')
+
+    def accepts(row) -> bool:
+        if status is not None and row[FIELD_INDEX['request_status']] != status:
+            return False
+        if master_id == NO_MASTER:
+            if row[FIELD_INDEX['master_id']] is not None:
+                return False
+        elif master_id is not None and row[FIELD_INDEX['master_id']] != master_id:
+            return False
+        start_date = row[FIELD_INDEX['start_date']]
+        if date_from is not None and (start_date is None or start_date < date_from):
+            return False
+        if date_to is not None and (start_date is None or start_date > date_to):
+            return False
+        return True
+
+    return accepts
+
+
+def filter_covers(loaded: dict, wanted: dict) -> bool:
+    """Строки, полностью загруженные по фильтру loaded, содержат все
+    строки фильтра wanted (значит, wanted можно применить на клиенте)"""
+    for key in ('status', 'master_id'):
+        if loaded.get(key) is not None and loaded.get(key) != wanted.get(key):
+            return False
+    if loaded.get('date_from') is not None:
+        if wanted.get('date_from') is None or wanted['date_from'] < loaded['date_from']:
+            return False
+    if loaded.get('date_to') is not None:
+        if wanted.get('date_to') is None or wanted['date_to'] > loaded['date_to']:
+            return False
+    return True
+
+
+def newest_first(row):
+    """ORDER BY request_id DESC"""
+    return -row[FIELD_INDEX['request_id']]
+
+
+def by_due_date(row):
+    """ORDER BY COALESCE(due_date, 'infinity'), request_id"""
+    return (row[FIELD_INDEX['due_date']] or datetime.date.max, row[FIELD_INDEX['request_id']])
+
+
+class RequestStore(QObject):
+    """Общее для всех таблиц хранилище заявок по request_id.
+
+    Модели хранят только списки ID и читают строки отсюда, поэтому
+    заявка, изменённая в одном месте, обновляется во всех вкладках.
+    changed сообщает ID заявок, строки которых изменились.
+    """
+
+    changed = pyqtSignal(list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = {}
+
+    def get(self, request_id: int):
+        return self._rows.get(request_id)
+
+    def merge(self, requests) -> list:
+        """Добавляет загруженные заявки; о строках, которые уже были
+        и изменились, сообщает через changed. Возвращает их ID по порядку."""
+        ids = []
+        updated = []
+        for request in requests:
+            row = request_to_row(request)
+            request_id = row[0]
+            old = self._rows.get(request_id)
+            if old is not None and old != row:
+                updated.append(request_id)
+            self._rows[request_id] = row
+            ids.append(request_id)
+        if updated:
+            self.changed.emit(updated)
+        return ids
+
+    def update(self, requests):
+        """Свежие строки после изменения заявок (в т.ч. новых)"""
+        ids = []
+        for request in requests:
+            row = request_to_row(request)
+            self._rows[row[0]] = row
+            ids.append(row[0])
+        if ids:
+            self.changed.emit(ids)
+
+
+class RequestTableModel(QAbstractTableModel):
+    """Модель таблицы заявок — отфильтрованная проекция RequestStore.
+
+    Строки хранятся кортежами в общем хранилище, модель держит только
+    список ID; текст ячеек формируется в data() только для отрисовываемых
+    ячеек. Если задан fetch_page, данные подгружаются страницами по мере
+    прокрутки (canFetchMore/fetchMore):
+    fetch_page(after) -> (заявки, курсор следующей страницы или None).
+    С async_db (AsyncDatabase) страницы загружаются в фоне.
+
+    accepts(row) и sort_key(row) повторяют отбор и порядок запроса: по ним
+    изменённая в хранилище заявка остаётся, убирается или вставляется
+    на своё место без перезагрузки таблицы.
+    """
+
+    def __init__(self, columns, parent=None, async_db=None, store=None):
+        super().__init__(parent)
+        self.columns = [REQUEST_COLUMNS[key] for key in columns]
+        self._async_db = async_db
+        self._store = store if store is not None else RequestStore(self)
+        self._store.changed.connect(self._on_store_changed)
+        self._ids = []
+        self._accepts = None
+        self._sort_key = None
+        self._fetch_page = None
+        self._next_after = None
+        self._has_more = False
+        self._loading = False
+
+    # ----- загрузка -----
+
+    def _cancel_loading(self):
+        if self._async_db is not None:
+            self._async_db.cancel(self)
+        self._loading = False
+
+    def set_rows(self, requests):
+        """Заменяет содержимое готовым списком заявок (без подгрузки).
+
+        Порядок сохраняется; заявки из списка обновляются при изменении,
+        но не убираются и новые не добавляются.
+        """
+        self._cancel_loading()
+        self.beginResetModel()
+        self._ids = []
+        self._accepts = None
+        self._sort_key = None
+        self._fetch_page = None
+        self._has_more = False
+        self.endResetModel()
+        self.append_requests(requests)
+
+    def set_source(self, fetch_page, accepts=None, sort_key=newest_first):
+        """Очищает модель и загружает первую страницу из fetch_page"""
+        self._cancel_loading()
+        self.beginResetModel()
+        self._ids = []
+        self._accepts = accepts
+        self._sort_key = sort_key
+        self._fetch_page = fetch_page
+        self._next_after = None
+        self._has_more = True
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._has_more
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self._has_more or self._loading:
+            return
+        if self._async_db is None:
+            self._on_page(self._fetch_page(self._next_after))
+            return
+
+        self._loading = True
+        self._async_db.call(
+            self, self._fetch_page, self._next_after,
+            on_result=self._on_page,
+            on_error=self._on_page_error
+        )
+
+    def is_loading(self) -> bool:
+        return self._loading
+
+    def is_complete(self) -> bool:
+        """Все строки источника загружены"""
+        return not self._has_more and not self._loading
+
+    def _on_page(self, result):
+        page, self._next_after = result
+        self._loading = False
+        self._has_more = self._next_after is not None
+        self.append_requests(page)
+
+    def _on_page_error(self, error):
+        # Повторная попытка — по кнопке "Обновить"
+        print(f"RequestTableModel: ошибка загрузки страницы: {error}")
+        self._loading = False
+        self._has_more = False
+
+    def append_requests(self, requests):
+        ids = self._store.merge(requests)
+        # Заявка могла попасть в таблицу раньше своей страницы (после изменения)
+        present = set(self._ids)
+        ids = [request_id for request_id in ids if request_id not in present]
+        if not ids:
+            return
+        first = len(self._ids)
+        self.beginInsertRows(QModelIndex(), first, first + len(ids) - 1)
+        self._ids.extend(ids)
+        self.endInsertRows()
+
+    # ----- изменения в хранилище -----
+
+    def _on_store_changed(self, request_ids):
+        for request_id in request_ids:
+            row = self._store.get(request_id)
+            try:
+                pos = self._ids.index(request_id)
+            except ValueError:
+                pos = None
+
+            if self._accepts is None:
+                # Готовый список (результаты поиска): только обновляем строку
+                if pos is not None:
+                    self._row_changed(pos)
+                continue
+
+            accepted = self._accepts(row)
+            if pos is not None and accepted and self._in_order(pos):
+                self._row_changed(pos)
+                continue
+
+            if pos is not None:
+                self.beginRemoveRows(QModelIndex(), pos, pos)
+                del self._ids[pos]
+                self.endRemoveRows()
+            if accepted:
+                self._insert_sorted(request_id, row)
+
+    def _in_order(self, pos) -> bool:
+        """Строка pos стоит на своём месте по sort_key"""
+        key = self._sort_key(self._store.get(self._ids[pos]))
+        if pos > 0 and self._sort_key(self._store.get(self._ids[pos - 1])) > key:
+            return False
+        if pos + 1 < len(self._ids) and key > self._sort_key(self._store.get(self._ids[pos + 1])):
+            return False
+        return True
+
+    def _row_changed(self, pos):
+        self.dataChanged.emit(
+            self.index(pos, 0), self.index(pos, len(self.columns) - 1)
+        )
+
+    def _insert_sorted(self, request_id, row):
+        key = self._sort_key(row)
+        pos = bisect.bisect_left(
+            self._ids, key, key=lambda rid: self._sort_key(self._store.get(rid))
+        )
+        if pos == len(self._ids) and self._has_more:
+            # За пределами загруженных страниц — придёт со своей страницей
+            return
+        self.beginInsertRows(QModelIndex(), pos, pos)
+        self._ids.insert(pos, request_id)
+        self.endInsertRows()
+
+    # ----- доступ к строкам -----
+
+    def request_id(self, row: int) -> int:
+        return self._ids[row]
+
+    def row(self, row: int) -> tuple:
+        return self._store.get(self._ids[row])
+
+    def value(self, row: int, field: str):
+        return self._store.get(self._ids[row])[FIELD_INDEX[field]]
+
+    # ----- интерфейс QAbstractTableModel -----
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        field = self.columns[index.column()][1]
+        value = self._store.get(self._ids[index.row()])[FIELD_INDEX[field]]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return format_cell(field, value)
+        if role == Qt.ItemDataRole.ToolTipRole and field == 'problem_description':
+            return value
+        if role == Qt.ItemDataRole.UserRole:
+            return value
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.columns[section][0]
+        return None
+
+
+class RequestFilterProxyModel(QSortFilterProxyModel):
+    """Фильтр (matches_filter) и сортировка по любой колонке поверх
+    уже загруженных строк RequestTableModel — без запросов к БД.
+
+    Подгрузка страниц (canFetchMore/fetchMore) передаётся исходной модели.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.filters = {}
+        self._accepts = None
+
+    def set_filter(self, filters: dict):
+        self.filters = dict(filters)
+        self._accepts = matches_filter(self.filters) if any(
+            value is not None for value in self.filters.values()
+        ) else None
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._accepts is None:
+            return True
+        return self._accepts(self.sourceModel().row(source_row))
+
+    def lessThan(self, left, right):
+        # Сравниваем исходные значения (даты, числа), пустые — в начале
+        a = left.data(Qt.ItemDataRole.UserRole)
+        b = right.data(Qt.ItemDataRole.UserRole)
+        if a is None:
+            return b is not None
+        if b is None:
+            return False
+        return a < b
+
+    def request_id(self, row: int) -> int:
+        source = self.mapToSource(self.index(row, 0))
+        return self.sourceModel().request_id(source.row())
+
+
+class CommentListModel(QAbstractListModel):
+    """Лента комментариев заявки, от новых к старым.
+
+    Первая страница приходит вместе с заявкой (get_request_details),
+    следующие подгружаются при прокрутке:
+    fetch_page(after) -> (комментарии, курсор следующей страницы или None).
+    """
+
+    def __init__(self, parent=None, async_db=None):
+        super().__init__(parent)
+        self._async_db = async_db
+        self._comments = []
+        self._fetch_page = None
+        self._after = None
+        self._loading = False
+
+    def set_first_page(self, comments, after, fetch_page):
+        if self._async_db is not None:
+            self._async_db.cancel(self)
+        self.beginResetModel()
+        self._comments = list(comments)
+        self._after = after
+        self._fetch_page = fetch_page
+        self._loading = False
+        self.endResetModel()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._after is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._after is None or self._loading:
+            return
+        if self._async_db is None:
+            self._on_page(self._fetch_page(self._after))
+            return
+
+        self._loading = True
+        self._async_db.call(
+            self, self._fetch_page, self._after,
+            on_result=self._on_page,
+            on_error=self._on_page_error
+        )
+
+    def _on_page(self, result):
+        comments, self._after = result
+        self._loading = False
+        if not comments:
+            return
+        first = len(self._comments)
+        self.beginInsertRows(QModelIndex(), first, first + len(comments) - 1)
+        self._comments.extend(comments)
+        self.endInsertRows()
+
+    def _on_page_error(self, error):
+        print(f"CommentListModel: ошибка загрузки страницы: {error}")
+        self._loading = False
+        self._after = None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._comments)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        comment = self._comments[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            created_at = comment['created_at']
+            stamp = f"{created_at:%d.%m.%Y %H:%M} " if created_at else ''
+            return f"{stamp}{comment['master_name']}:\n{comment['message']}"
+        if role == Qt.ItemDataRole.UserRole:
+            return comment['comment_id']
+        return None
@@ -37,14 +37,52 @@ CREATE TABLE IF NOT EXISTS comments (
     request_id INTEGER NOT NULL REFERENCES requests(request_id) ON DELETE CASCADE
 );
 
+-- Служебные таблицы импорта (import_data.py --resumable):
+-- соответствие ID из исходных файлов и ID в БД, прогресс по файлам
+CREATE TABLE IF NOT EXISTS import_id_map (
+    entity VARCHAR(20) NOT NULL,
+    source_id VARCHAR(50) NOT NULL,
+    db_id INTEGER NOT NULL,
+    PRIMARY KEY (entity, source_id)
+);
+
+CREATE TABLE IF NOT EXISTS import_checkpoints (
+    source_file TEXT PRIMARY KEY,
+    lines_done INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Индексы для оптимизации запросов
 CREATE INDEX IF NOT EXISTS idx_requests_status ON requests(request_status);
 CREATE INDEX IF NOT EXISTS idx_requests_master ON requests(master_id);
 CREATE INDEX IF NOT EXISTS idx_requests_client ON requests(client_id);
 CREATE INDEX IF NOT EXISTS idx_requests_date ON requests(start_date);
-CREATE INDEX IF NOT EXISTS idx_comments_request ON comments(request_id);
+-- Изменения после метки времени (get_requests_changed_since)
+CREATE INDEX IF NOT EXISTS idx_requests_updated ON requests(updated_at);
+-- Постраничная выдача по статусу (get_requests_page)
+CREATE INDEX IF NOT EXISTS idx_requests_status_id ON requests(request_status, request_id DESC);
+-- Очередь неназначенных заявок по сроку (get_unassigned_requests)
+CREATE INDEX IF NOT EXISTS idx_requests_unassigned
+    ON requests((COALESCE(due_date, 'infinity'::date)), request_id)
+    WHERE master_id IS NULL;
+-- Лента комментариев заявки по страницам (get_comments_page);
+-- заменяет индекс только по request_id
+DROP INDEX IF EXISTS idx_comments_request;
+CREATE INDEX IF NOT EXISTS idx_comments_request_created
+    ON comments(request_id, created_at DESC, comment_id DESC);
 CREATE INDEX IF NOT EXISTS idx_users_login ON users(login);
-CREATE INDEX IF NOT EXISTS idx_users_type ON users(user_type);
+-- Фильтр по роли с постраничной выдачей по user_id (get_users_page);
+-- заменяет индекс только по user_type
+DROP INDEX IF EXISTS idx_users_type;
+CREATE INDEX IF NOT EXISTS idx_users_type_id ON users(user_type, user_id);
+
+-- Триграммные индексы для поиска (search_requests_ranked)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_requests_type_trgm ON requests USING GIN (climate_tech_type gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_requests_model_trgm ON requests USING GIN (climate_tech_model gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_requests_problem_trgm ON requests USING GIN (problem_description gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_users_fio_trgm ON users USING GIN (fio gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_users_phone_trgm ON users USING GIN (phone gin_trgm_ops);
 
 -- Триггер для автоматического обновления updated_at
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -0,0 +1,259 @@
+"""
+Тесты проверки и пакетной обработки файлов импорта (import_data.py).
+
+Запускаются без БД: проверяются только функции, работающие с файлами.
+"""
+
+import csv
+import io
+
+import pytest
+
+pytest.importorskip('psycopg2')
+pytest.importorskip('bcrypt')
+
+from import_data import (
+    Checkpoint, RejectReport, RowsAsCsv, check_batches, file_checks,
+    iter_batches, load_valid_rows, print_bulk_report, split_batch, validate_rows
+)
+
+USERS_HEADER = ['userID', 'fio', 'phone', 'login', 'password', 'type']
+
+
+def user(user_id, login, user_type='Заказчик'):
+    return {
+        'userID': user_id, 'fio': f'Пользователь {user_id}', 'phone': '89990000000',
+        'login': login, 'password': 'secret', 'type': user_type
+    }
+
+
+def write_csv(path, header, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=header, delimiter=';')
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+# ===================== validate_rows =====================
+
+def test_validate_rows_reports_every_failed_check():
+    rows = [
+        user('1', 'a'),
+        user('2', '', user_type='Директор'),
+    ]
+    reasons = validate_rows(rows, file_checks('users'))
+    assert reasons[0] == []
+    assert any(reason.startswith('login: пустое значение') for reason in reasons[1])
+    assert any(reason.startswith('type: роль вне списка CHECK') for reason in reasons[1])
+
+
+def test_validate_rows_keeps_first_occurrence_of_unique_value():
+    rows = [user('1', 'a'), user('2', 'a'), user('1', 'b')]
+    reasons = validate_rows(rows, file_checks('users'), ['userID', 'login'])
+    assert reasons[0] == []
+    assert reasons[1] == ["login: повторяется в файле ('a')"]
+    assert reasons[2] == ["userID: повторяется в файле ('1')"]
+
+
+def test_validate_rows_remembers_unique_values_between_batches():
+    checks = file_checks('users')
+    seen = {'userID': set(), 'login': set()}
+    assert validate_rows([user('1', 'a')], checks, ['userID', 'login'], seen) == [[]]
+    assert validate_rows([user('1', 'b')], checks, ['userID', 'login'], seen) == [
+        ["userID: повторяется в файле ('1')"]
+    ]
+
+
+def test_validate_rows_accepts_duplicate_of_rejected_row():
+    rows = [user('1', 'a', user_type='Директор'), user('1', 'a')]
+    reasons = validate_rows(rows, file_checks('users'), ['userID', 'login'])
+    assert reasons[0] and reasons[1] == []
+
+
+# ===================== iter_batches / check_batches =====================
+
+def test_iter_batches_numbers_rows_from_file_start():
+    batches = list(iter_batches(iter('abcde'), 0, 2))
+    assert batches == [[(1, 'a'), (2, 'b')], [(3, 'c'), (4, 'd')], [(5, 'e')]]
+
+
+def test_iter_batches_resumes_after_checkpoint():
+    batches = list(iter_batches(iter('abcde'), 3, 2))
+    assert batches == [[(4, 'd'), (5, 'e')]]
+    assert list(iter_batches(iter('abc'), 3, 2)) == []
+
+
+def test_check_batches_finds_duplicates_across_batches(tmp_path):
+    filename = write_csv(tmp_path / 'users.csv', USERS_HEADER, [
+        user('1', 'a'), user('2', 'b'), user('3', 'a')
+    ])
+    batches = list(check_batches(None, 'users', filename, batch_size=2, references=None))
+    assert [len(batch) for batch in batches] == [2, 1]
+    number, row, reasons = batches[1][0]
+    assert (number, row['userID']) == (3, '3')
+    assert reasons == ["login: повторяется в файле ('a')"]
+
+
+def test_check_batches_skips_rows_before_checkpoint(tmp_path):
+    filename = write_csv(tmp_path / 'users.csv', USERS_HEADER, [
+        user('1', 'a'), user('2', 'b'), user('3', 'c')
+    ])
+    batches = list(check_batches(None, 'users', filename, start=2, references=None))
+    assert [(number, row['userID']) for number, row, _ in batches[0]] == [(3, '3')]
+
+
+# ===================== Checkpoint =====================
+
+def test_checkpoint_advances_over_processed_rows():
+    checkpoint = Checkpoint(10)
+    checkpoint.mark(11, True)
+    checkpoint.mark(12, True)
+    assert checkpoint.lines_done == 12
+
+
+def test_checkpoint_stops_at_first_rejected_row():
+    checkpoint = Checkpoint(0)
+    checkpoint.mark(1, True)
+    checkpoint.mark(2, False)
+    checkpoint.mark(3, True)
+    checkpoint.mark(4, True)
+    assert checkpoint.lines_done == 1
+
+
+def request(request_id, client_id):
+    return {
+        'requestID': request_id, 'startDate': '2023-06-01', 'climateTechType': 'Кондиционер',
+        'climateTechModel': 'Model', 'problemDescryption': 'Не работает',
+        'requestStatus': 'Новая заявка', 'completionDate': 'null', 'repairParts': '',
+        'masterID': 'null', 'clientID': client_id
+    }
+
+
+def resume_run(filename, start, user_map, request_map, batch_size=2):
+    """Один запуск resumable_import_requests без БД: загрузка — запись
+    в request_map. Returns: (отчёт, новая контрольная точка)"""
+    checkpoint = Checkpoint(start)
+    with RejectReport(filename) as report:
+        for batch in check_batches(None, 'requests', filename, start, batch_size, references=None):
+            pending, _ = split_batch(
+                batch, report, checkpoint, request_map, 'requestID',
+                [('clientID', user_map, False), ('masterID', user_map, True)]
+            )
+            for row in pending:
+                request_map[row['requestID']] = len(request_map) + 1
+    return report, checkpoint.lines_done
+
+
+def test_resume_retries_row_rejected_for_missing_reference(tmp_path):
+    """Заявка с клиентом, которого нет в import_id_map, попадает в отчёт,
+    не уходит за контрольную точку и загружается при следующем запуске"""
+    filename = write_csv(tmp_path / 'requests.csv', list(request('1', '7')), [
+        request('1', '7'), request('2', '8'), request('3', '7')
+    ])
+    request_map = {}
+
+    report, lines_done = resume_run(filename, 0, {'7': 1}, request_map)
+    assert report.count == 1
+    with open(report.filename, encoding='utf-8') as file:
+        assert 'clientID: нет в import_id_map' in file.read()
+    assert set(request_map) == {'1', '3'}
+    assert lines_done == 1
+
+    # Клиент 8 загружен — повторный запуск начинает со строки 2
+    report, lines_done = resume_run(filename, lines_done, {'7': 1, '8': 2}, request_map)
+    assert report.count == 0
+    assert set(request_map) == {'1', '2', '3'}
+    assert lines_done == 3
+
+
+def test_resume_retries_row_corrected_in_file(tmp_path):
+    """Строка, исправленная после отказа проверки, загружается повторным запуском"""
+    rows = [request('1', '7'), request('2', '7'), request('3', '7')]
+    rows[1]['startDate'] = '01.06.2023'
+    filename = write_csv(tmp_path / 'requests.csv', list(rows[0]), rows)
+    request_map = {}
+
+    report, lines_done = resume_run(filename, 0, {'7': 1}, request_map)
+    assert report.count == 1 and lines_done == 1
+
+    rows[1]['startDate'] = '2023-06-01'
+    write_csv(tmp_path / 'requests.csv', list(rows[0]), rows)
+    report, lines_done = resume_run(filename, lines_done, {'7': 1}, request_map)
+    assert report.count == 0
+    assert set(request_map) == {'1', '2', '3'}
+    assert lines_done == 3
+
+
+# ===================== RejectReport / load_valid_rows =====================
+
+def test_load_valid_rows_writes_rejects_with_file_line_numbers(tmp_path):
+    filename = write_csv(tmp_path / 'users.csv', USERS_HEADER, [
+        user('1', 'a'), user('2', 'b', user_type='Директор'), user('3', 'c')
+    ])
+    with RejectReport(filename) as report:
+        clean = list(load_valid_rows(None, 'users', filename, report))
+
+    assert [row['userID'] for row in clean] == ['1', '3']
+    assert report.count == 1
+    with open(report.filename, encoding='utf-8') as file:
+        lines = list(csv.reader(file, delimiter=';'))
+    assert lines[0] == ['line'] + USERS_HEADER + ['reason']
+    # Заголовок — строка 1, вторая строка данных — строка 3 файла
+    assert lines[1][0] == '3' and lines[1][1] == '2'
+
+
+def test_reject_report_removes_stale_report(tmp_path):
+    filename = write_csv(tmp_path / 'users.csv', USERS_HEADER, [user('1', 'a')])
+    stale = tmp_path / 'users.csv.rejected.csv'
+    stale.write_text('line;reason\n', encoding='utf-8')
+
+    with RejectReport(filename) as report:
+        assert list(load_valid_rows(None, 'users', filename, report))
+    assert report.count == 0
+    assert not stale.exists()
+
+
+def test_print_bulk_report_counts_rows_rejected_before_loading(capsys):
+    print_bulk_report('Заявки', 8, 7, 0.0, rejected=2)
+    assert 'загружено 7 из 10 строк (отклонено 3)' in capsys.readouterr().out
+
+
+# ===================== RowsAsCsv =====================
+
+ROWS = [
+    {'id': '1', 'message': 'просто текст'},
+    {'id': '2', 'message': 'с ; разделителем и "кавычками"'},
+    {'id': '3', 'message': ''},
+]
+
+
+def test_rows_as_csv_readline_starts_with_header():
+    file = RowsAsCsv(ROWS)
+    assert file.readline() == 'id;message\n'
+    assert file.readline() == '1;просто текст\n'
+
+
+def test_rows_as_csv_read_in_small_chunks_round_trips():
+    file = RowsAsCsv(ROWS)
+    chunks = []
+    while True:
+        chunk = file.read(5)
+        if not chunk:
+            break
+        assert len(chunk) <= 5
+        chunks.append(chunk)
+    parsed = list(csv.DictReader(io.StringIO(''.join(chunks)), delimiter=';'))
+    assert parsed == ROWS
+
+
+def test_rows_as_csv_read_after_readline_continues_from_same_place():
+    file = RowsAsCsv(ROWS)
+    header = file.readline()
+    rest = file.read()
+    assert header + rest == 'id;message\n1;просто текст\n2;"с ; разделителем и ""кавычками"""\n3;\n'
+    assert file.read() == ''
+
+
+def test_rows_as_csv_empty_input():
+    assert RowsAsCsv([]).read() == ''
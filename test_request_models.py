@@ -0,0 +1,182 @@
+"""
+Тесты клиентского отбора и порядка строк таблиц заявок (request_models.py).
+
+Запускаются без БД: страницы отдаёт функция-источник в памяти.
+"""
+
+from datetime import date
+
+import pytest
+
+pytest.importorskip('psycopg2')
+pytest.importorskip('bcrypt')
+QtCore = pytest.importorskip('PyQt6.QtCore')
+
+from database_module import NO_MASTER
+from request_models import (
+    RequestFilterProxyModel, RequestStore, RequestTableModel, by_due_date, by_status,
+    filter_covers, matches_filter, request_to_row
+)
+
+
+@pytest.fixture(scope='module', autouse=True)
+def app():
+    return QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+
+
+def request(request_id, status='Новая заявка', master_id=None,
+            start_date=date(2023, 6, 1), due_date=None):
+    return {
+        'request_id': request_id, 'start_date': start_date,
+        'climate_tech_type': 'Кондиционер', 'climate_tech_model': 'Model',
+        'problem_description': 'Не работает', 'request_status': status,
+        'due_date': due_date, 'completion_date': None,
+        'client_name': 'Клиент', 'master_name': None,
+        'client_id': 1, 'master_id': master_id,
+    }
+
+
+# ===================== matches_filter =====================
+
+def test_matches_filter_by_status_and_master():
+    accepts = matches_filter({'status': 'В процессе ремонта', 'master_id': 5})
+    assert accepts(request_to_row(request(1, 'В процессе ремонта', master_id=5)))
+    assert not accepts(request_to_row(request(2, 'Новая заявка', master_id=5)))
+    assert not accepts(request_to_row(request(3, 'В процессе ремонта', master_id=6)))
+
+
+def test_matches_filter_no_master_selects_unassigned():
+    accepts = matches_filter({'master_id': NO_MASTER})
+    assert accepts(request_to_row(request(1)))
+    assert not accepts(request_to_row(request(2, master_id=5)))
+
+
+def test_matches_filter_period_is_inclusive():
+    accepts = matches_filter({'date_from': date(2023, 6, 1), 'date_to': date(2023, 6, 30)})
+    assert accepts(request_to_row(request(1, start_date=date(2023, 6, 1))))
+    assert accepts(request_to_row(request(2, start_date=date(2023, 6, 30))))
+    assert not accepts(request_to_row(request(3, start_date=date(2023, 7, 1))))
+    assert not accepts(request_to_row(request(4, start_date=None)))
+
+
+def test_matches_filter_without_conditions_accepts_everything():
+    assert matches_filter({})(request_to_row(request(1, start_date=None)))
+
+
+# ===================== filter_covers =====================
+
+def test_everything_loaded_covers_any_filter():
+    assert filter_covers({}, {'status': 'Новая заявка', 'date_from': date(2023, 1, 1)})
+
+
+def test_status_filter_covers_only_same_status():
+    loaded = {'status': 'Новая заявка'}
+    assert filter_covers(loaded, {'status': 'Новая заявка', 'master_id': 5})
+    assert not filter_covers(loaded, {'status': 'Готова к выдаче'})
+    assert not filter_covers(loaded, {})
+
+
+def test_period_covers_only_narrower_period():
+    loaded = {'date_from': date(2023, 1, 1), 'date_to': date(2023, 12, 31)}
+    assert filter_covers(loaded, {'date_from': date(2023, 3, 1), 'date_to': date(2023, 4, 1)})
+    assert not filter_covers(loaded, {'date_from': date(2022, 12, 1), 'date_to': date(2023, 4, 1)})
+    assert not filter_covers(loaded, {'date_from': date(2023, 3, 1)})
+
+
+# ===================== RequestTableModel._insert_sorted =====================
+
+def loaded_model(pages, **source):
+    """Модель, загрузившая страницы pages синхронно (без async_db);
+    по умолчанию отбор — все заявки, как на вкладке "Мои заявки" менеджера"""
+    source.setdefault('accepts', by_status(None))
+    store = RequestStore()
+    model = RequestTableModel(['id', 'status', 'due'], store=store)
+    remaining = list(pages)
+
+    def fetch_page(after):
+        page = remaining.pop(0)
+        return page, (page[-1]['request_id'] if remaining else None)
+
+    model.set_source(fetch_page, **source)
+    return model, store
+
+
+def model_ids(model):
+    return [model.request_id(row) for row in range(model.rowCount())]
+
+
+def test_new_request_is_inserted_in_sort_order():
+    model, store = loaded_model([[request(10), request(8), request(6)]])
+    store.update([request(9), request(11)])
+    assert model_ids(model) == [11, 10, 9, 8, 6]
+
+
+def test_request_past_loaded_pages_waits_for_its_page():
+    model, store = loaded_model([[request(10), request(8)], [request(6)]])
+    store.update([request(9), request(3)])
+    assert model_ids(model) == [10, 9, 8]
+
+    model.fetchMore()
+    assert model_ids(model) == [10, 9, 8, 6]
+
+
+def test_changed_sort_key_moves_row():
+    model, store = loaded_model(
+        [[request(1, due_date=date(2023, 6, 1)), request(2, due_date=date(2023, 6, 5)),
+          request(3)]],
+        sort_key=by_due_date
+    )
+    assert model_ids(model) == [1, 2, 3]
+
+    store.update([request(1, due_date=date(2023, 6, 10))])
+    assert model_ids(model) == [2, 1, 3]
+    # Без срока — в конце, как COALESCE(due_date, 'infinity')
+    store.update([request(2, due_date=None)])
+    assert model_ids(model) == [1, 2, 3]
+
+
+def test_request_leaving_filter_is_removed():
+    model, store = loaded_model(
+        [[request(3), request(2), request(1)]],
+        accepts=by_status('Новая заявка')
+    )
+    store.update([request(2, status='В процессе ремонта')])
+    assert model_ids(model) == [3, 1]
+    store.update([request(2)])
+    assert model_ids(model) == [3, 2, 1]
+
+
+def search_result(request_id, **fields):
+    """Строка search_requests_ranked: полная заявка плюс телефон и ранг"""
+    return {**request(request_id, **fields), 'client_phone': '89990000000', 'rank': 0.5}
+
+
+def test_search_results_leave_other_projections_unchanged():
+    unassigned, store = loaded_model(
+        [[request(1)]], accepts=matches_filter({'master_id': NO_MASTER})
+    )
+    assigned = RequestTableModel(['id', 'status', 'master'], store=store)
+    assigned.set_source(
+        lambda after: ([request(2, master_id=5)], None),
+        accepts=matches_filter({'master_id': 5})
+    )
+
+    search = RequestTableModel(['id', 'status', 'master'], store=store)
+    search.set_rows([search_result(2, master_id=5), search_result(1)])
+
+    assert model_ids(search) == [2, 1]
+    assert model_ids(unassigned) == [1]
+    assert model_ids(assigned) == [2]
+    assert store.get(2) == request_to_row(request(2, master_id=5))
+
+
+def test_master_filter_applies_to_search_results():
+    search = RequestTableModel(['id', 'status', 'master'], store=RequestStore())
+    search.set_rows([search_result(3, master_id=5), search_result(2), search_result(1, master_id=6)])
+    proxy = RequestFilterProxyModel()
+    proxy.setSourceModel(search)
+
+    proxy.set_filter({'master_id': 5})
+    assert [proxy.request_id(row) for row in range(proxy.rowCount())] == [3]
+    proxy.set_filter({'master_id': NO_MASTER})
+    assert [proxy.request_id(row) for row in range(proxy.rowCount())] == [2]
@@ -0,0 +1,181 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from PyQt6.QtWidgets import QComboBox, QStyledItemDelegate
+
+
+# Роли, которые администратор может назначить (порядок как в выпадающем списке)
+ROLE_CHOICES = ['Заказчик', 'Специалист', 'Оператор', 'Менеджер', 'Менеджер по качеству']
+
+USER_COLUMNS = [
+    ('ID', 'user_id'),
+    ('ФИО', 'fio'),
+    ('Телефон', 'phone'),
+    ('Логин', 'login'),
+    ('Роль', 'user_type'),
+]
+ROLE_COLUMN = 4
+
+# Размер страницы пользователей при подгрузке по прокрутке
+USERS_PAGE_SIZE = 200
+
+
+class UserTableModel(QAbstractTableModel):
+    """Модель таблицы пользователей с подгрузкой страниц по прокрутке.
+
+    fetch_page(after_id) -> (пользователи, курсор следующей страницы или None).
+    Колонка "Роль" редактируется через RoleDelegate; сама модель в БД не
+    пишет, а испускает role_change_requested — новая роль отображается
+    после подтверждения (set_user_type).
+    """
+
+    role_change_requested = pyqtSignal(int, str)
+
+    def __init__(self, parent=None, async_db=None, locked_ids=()):
+        super().__init__(parent)
+        self._async_db = async_db
+        # Пользователи, которым нельзя менять роль (сам администратор)
+        self.locked_ids = set(locked_ids)
+        self._users = []
+        self._fetch_page = None
+        self._next_after_id = None
+        self._has_more = False
+        self._loading = False
+
+    # ----- загрузка -----
+
+    def set_source(self, fetch_page):
+        if self._async_db is not None:
+            self._async_db.cancel(self)
+        self.beginResetModel()
+        self._users = []
+        self._fetch_page = fetch_page
+        self._next_after_id = None
+        self._has_more = True
+        self._loading = False
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._has_more
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self._has_more or self._loading:
+            return
+        if self._async_db is None:
+            self._on_page(self._fetch_page(self._next_after_id))
+            return
+
+        self._loading = True
+        self._async_db.call(
+            self, self._fetch_page, self._next_after_id,
+            on_result=self._on_page,
+            on_error=self._on_page_error
+        )
+
+    def _on_page(self, result):
+        users, self._next_after_id = result
+        self._loading = False
+        self._has_more = self._next_after_id is not None
+        if not users:
+            return
+        first = len(self._users)
+        self.beginInsertRows(QModelIndex(), first, first + len(users) - 1)
+        self._users.extend(users)
+        self.endInsertRows()
+
+    def _on_page_error(self, error):
+        print(f"UserTableModel: ошибка загрузки страницы: {error}")
+        self._loading = False
+        self._has_more = False
+
+    # ----- доступ к строкам -----
+
+    def user(self, row: int) -> dict:
+        return self._users[row]
+
+    def _row_of(self, user_id: int):
+        for row, user in enumerate(self._users):
+            if user['user_id'] == user_id:
+                return row
+        return None
+
+    def set_user_type(self, user_id: int, user_type: str):
+        """Роль изменена в БД"""
+        row = self._row_of(user_id)
+        if row is None:
+            return
+        self._users[row]['user_type'] = user_type
+        index = self.index(row, ROLE_COLUMN)
+        self.dataChanged.emit(index, index)
+
+    def remove_user(self, user_id: int):
+        row = self._row_of(user_id)
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._users[row]
+        self.endRemoveRows()
+
+    def is_locked(self, row: int) -> bool:
+        user = self._users[row]
+        return user['user_id'] in self.locked_ids or user['login'] == 'admin'
+
+    # ----- интерфейс QAbstractTableModel -----
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._users)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(USER_COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self._users[index.row()][USER_COLUMNS[index.column()][1]]
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return '' if value is None else str(value)
+        if role == Qt.ItemDataRole.ToolTipRole and index.column() == ROLE_COLUMN:
+            if self.is_locked(index.row()):
+                return 'Роль этого пользователя менять нельзя'
+            return 'Дважды щёлкните, чтобы изменить роль'
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and index.column() == ROLE_COLUMN and not self.is_locked(index.row()):
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role != Qt.ItemDataRole.EditRole or index.column() != ROLE_COLUMN:
+            return False
+        user = self._users[index.row()]
+        if value == user['user_type']:
+            return False
+        self.role_change_requested.emit(user['user_id'], value)
+        return True
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return USER_COLUMNS[section][0]
+        return None
+
+
+class RoleDelegate(QStyledItemDelegate):
+    """Выпадающий список ролей только для редактируемой ячейки"""
+
+    def createEditor(self, parent, option, index):
+        editor = QComboBox(parent)
+        editor.addItems(ROLE_CHOICES)
+        # Роль применяется сразу после выбора, без ухода из ячейки
+        editor.activated.connect(lambda: self._commit(editor))
+        return editor
+
+    def _commit(self, editor):
+        self.commitData.emit(editor)
+        self.closeEditor.emit(editor)
+
+    def setEditorData(self, editor, index):
+        editor.setCurrentText(index.data(Qt.ItemDataRole.EditRole))
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.currentText(), Qt.ItemDataRole.EditRole)